@@ -1,59 +1,107 @@
+import gc
 import random
 import time
 import math
-from copy import deepcopy  # Para la clonación del tablero
+import multiprocessing
+from collections import Counter
 from hexboard import (
     HexBoard,
 )  # Asegúrate de que esta clase esté definida en hexboard.py
 from basic_classes import (
     Player,
 )  # Asegúrate de que esta clase esté definida en basic_classes.py
+from playouts import bitboard_connected, bitboard_masks, random_fill
 
 
-# Se asume que la clase HexBoard tiene los métodos:
-# - clone(): copia profunda del tablero.
+# Se asume que el tablero (MyBoard de hexboard.py, no basta el HexBoard básico) tiene:
+# - size: lado del tablero.
+# - clone(): copia del tablero.
 # - get_possible_moves(): retorna una lista de (fila, columna) de casillas vacías.
 # - place_piece(row, col, player_id): coloca la ficha si la casilla está vacía.
-# - check_connection(player_id): retorna True si el jugador logra la conexión ganadora.
+# - bitboard_p1 / bitboard_p2: fichas de cada jugador como enteros, con el bit
+#   fila * size + columna; los rollouts (random_fill y bitboard_connected) solo leen esto.
+# - undo(count): deshace las últimas count fichas; la búsqueda usa un solo tablero.
+# - move_history: lista de las fichas colocadas (su longitud marca la raíz al deshacer).
+# - winner: jugador que conectó sus lados (0 si ninguno), anotado por place_piece.
+# - zobrist_hash: hash de la posición, clave de la tabla de transposiciones.
 
 
 # ------------------------------
 # Clase para los nodos del árbol MCTS con RAVE
 # ------------------------------
 class TreeNode:
+    # Sin __dict__ por nodo: menos memoria y atributos más rápidos en árboles de miles de nodos.
+    __slots__ = (
+        "move",
+        "cell",
+        "parent",
+        "player",
+        "visits",
+        "inv_sqrt_visits",
+        "inv_visits",
+        "wins",
+        "rave_visits",
+        "rave_wins",
+        "untried_moves",
+        "children",
+    )
+
     def __init__(self, board: "HexBoard", move: tuple, parent: "TreeNode", player: int):
         """
-        board: estado del tablero en este nodo.
+        board: estado del tablero en este nodo (solo se leen sus movimientos posibles;
+               no se guarda, porque la búsqueda reutiliza un único tablero).
         move: movimiento que se realizó para llegar a este nodo (None para la raíz).
         parent: nodo padre (None para la raíz).
         player: identificador del jugador que realizó el movimiento en este nodo.
                 (NOTA: en la raíz se asigna el jugador que *jugó* el movimiento previo;
                 de esta manera, el siguiente movimiento en la expansión lo hará self.player_id)
         """
-        self.board = board  # Estado del tablero en este nodo
         self.move = move  # Movimiento (fila, col) aplicado para llegar a este nodo
+        # Índice fila * size + columna del movimiento, con el que se leen las listas RAVE
+        self.cell = None if move is None else move[0] * board.size + move[1]
         self.parent = parent
         self.player = player  # El jugador que realizó el movimiento en este nodo
 
         # Estadísticas para la MCTS tradicional:
         self.visits = 0
+        # 1 / sqrt(visits), actualizado en el backpropagation: best_child lo usa en el
+        # término de exploración sin calcular una raíz por hijo.
+        self.inv_sqrt_visits = 0.0
+        self.inv_visits = 0.0  # 1 / visits, también actualizado en el backpropagation
         self.wins = 0.0  # Número de simulaciones ganadoras (desde la perspectiva del jugador que movió en este nodo)
 
-        # Diccionarios para almacenar estadísticas RAVE para movimientos:
-        # Para cada movimiento (casilla) se almacenan:
-        #   rave_visits[move]: cantidad de veces que dicho movimiento apareció en la simulación
-        #   rave_wins[move]: cantidad de veces que dicho movimiento condujo a una victoria para el jugador de la simulación
-        self.rave_visits = {}
-        self.rave_wins = {}
+        # Estadísticas RAVE de los movimientos:
+        #   rave_visits: cantidad de simulaciones registradas en este nodo. Cada simulación
+        #     rellena todas las casillas vacías de la raíz, así que todo movimiento posible
+        #     aparece en cada una: el conteo de apariciones es el mismo para cualquier casilla.
+        #   rave_wins[cell]: cantidad de veces que el movimiento en la casilla fila * size + columna
+        #     condujo a una victoria para el jugador de la simulación (lista de tamaño fijo
+        #     indexada por casilla, en lugar de un diccionario con claves tupla).
+        self.rave_visits = 0
+        self.rave_wins = None
+
+        # Movimientos que aún no se han probado desde este nodo.
+        self.untried_moves = None
 
-        # Movimientos que aún no se han probado desde este nodo:
-        self.untried_moves = board.get_possible_moves()
+        # rave_wins y untried_moves ocupan una entrada por casilla y solo hacen falta cuando
+        # el nodo tiene hijos, pero la mayoría de los nodos del árbol son hojas visitadas una
+        # vez. Por eso se crean en la primera expansión del nodo (expand_lists); hasta
+        # entonces son None y el nodo no acumula estadísticas RAVE.
 
         # Los hijos se almacenarán en un diccionario: move -> TreeNode
         self.children = {}
 
     def is_fully_expanded(self):
-        return len(self.untried_moves) == 0
+        return self.untried_moves is not None and len(self.untried_moves) == 0
+
+    def expand_lists(self, board: "HexBoard"):
+        """
+        Crea las listas de movimientos sin probar y de victorias RAVE en la primera expansión;
+        board debe estar en la posición del nodo.
+        """
+        # Copia: la lista del tablero cambia con cada jugada y aquí se le quitan elementos
+        self.untried_moves = list(board._empty_cells())
+        self.rave_wins = [0] * (board.size * board.size)
 
     def best_child(self, exploration=math.sqrt(2), rave_constant=300):
         """Selecciona el mejor hijo usando una combinación UCT + RAVE.
@@ -67,30 +115,31 @@ class TreeNode:
         """
         best_value = -float("inf")
         best_child = None
+        # El numerador de exploración (c * sqrt(log N) del padre) es común a todos los hijos:
+        # se calcula una vez por selección en lugar de un logaritmo por hijo.
+        explore = exploration * math.sqrt(math.log(self.visits)) if self.visits else 0.0
+        # beta solo depende de las visitas del hijo: se lee de una tabla en vez de una raíz por hijo.
+        betas = rave_betas(rave_constant, self.visits)
         # Nota: usamos las estadísticas RAVE que están almacenadas en este nodo (como padre)
-        for move, child in self.children.items():
-            # Si el hijo no ha sido visitado, le damos un valor muy alto para favorecer su exploración.
-            if child.visits == 0:
-                uct_rave_val = float("inf")
-            else:
-                # Tasa de victoria MCTS tradicional en el hijo.
-                win_rate = child.wins / child.visits
-
-                # Obtención de las estadísticas RAVE para el movimiento aplicado en el hijo.
-                # Las estadísticas RAVE se almacenan en el nodo padre respecto a los movimientos
-                # que se han visto en simulaciones posteriores.
-                rave_visits = self.rave_visits.get(move, 0)
-                rave_wins = self.rave_wins.get(move, 0)
-                rave_win_rate = rave_wins / rave_visits if rave_visits > 0 else 0
-
-                beta = math.sqrt(rave_constant / (3 * child.visits + rave_constant))
-                # Combinamos la tasa MCTS y la tasa RAVE:
-                estimated_value = (1 - beta) * win_rate + beta * rave_win_rate
-                # Término de exploración (usamos logaritmo de visitas del padre)
-                exploration_term = exploration * math.sqrt(
-                    math.log(self.visits) / child.visits
-                )
-                uct_rave_val = estimated_value + exploration_term
+        all_rave_wins = self.rave_wins
+        inv_rave_visits = 1 / self.rave_visits if self.rave_visits else 0.0
+        # Todo hijo tiene visitas: se crea en la expansión y se retropropaga enseguida, y
+        # best_child solo se usa cuando ya no quedan movimientos sin probar. Así no hace
+        # falta el caso de hijo sin visitar (valor infinito) dentro del bucle.
+        for child in self.children.values():
+            # Tasa de victoria MCTS tradicional en el hijo.
+            win_rate = child.wins * child.inv_visits
+
+            # Obtención de las estadísticas RAVE para el movimiento aplicado en el hijo.
+            # Las estadísticas RAVE se almacenan en el nodo padre respecto a los movimientos
+            # que se han visto en simulaciones posteriores.
+            rave_win_rate = all_rave_wins[child.cell] * inv_rave_visits
+
+            beta = betas[child.visits]
+            # Combinamos la tasa MCTS y la tasa RAVE:
+            estimated_value = (1 - beta) * win_rate + beta * rave_win_rate
+            # Término de exploración (usamos logaritmo de visitas del padre)
+            uct_rave_val = estimated_value + explore * child.inv_sqrt_visits
 
             if uct_rave_val > best_value:
                 best_value = uct_rave_val
@@ -98,143 +147,326 @@ class TreeNode:
         return best_child
 
 
+# ------------------------------
+# Tabla de pesos RAVE
+# ------------------------------
+# rave_constant -> lista con beta(n) = sqrt(rave_constant / (3 * n + rave_constant)) para cada
+# número de visitas n; cada lista crece a medida que la búsqueda acumula visitas.
+_rave_beta_tables = {}
+
+
+def rave_betas(rave_constant: float, max_visits: int) -> list:
+    """Retorna la tabla de beta para rave_constant, con al menos las entradas 0..max_visits."""
+    table = _rave_beta_tables.setdefault(rave_constant, [])
+    if len(table) <= max_visits:
+        table.extend(
+            math.sqrt(rave_constant / (3 * n + rave_constant))
+            for n in range(len(table), 2 * max_visits + 1)
+        )
+    return table
+
+
 # ------------------------------
 # Función de simulación (rollout) con registro de movimientos y quién los jugó.
 # ------------------------------
-def rollout(board: "HexBoard", current_player: int) -> tuple[int, list]:
+def rollout(board: "HexBoard", current_player: int) -> tuple[int, int]:
     """
     Realiza una simulación (random playout) a partir del estado actual del tablero.
 
+    En vez de jugar ficha a ficha comprobando la conexión tras cada jugada, se rellena
+    al azar todo el tablero con bitboards (playouts.random_fill): un tablero lleno de
+    Hex tiene exactamente un ganador, el mismo que habría conectado primero jugando en
+    ese orden. El tablero no se modifica.
+
     Retorna:
       - winner: el identificador del jugador ganador.
-      - sim_moves: una lista de tuplas (move, player) indicando el movimiento y el jugador que lo realizó.
+      - winner_stones: bitboard con las fichas del ganador en el tablero lleno; las casillas
+        vacías que no están en él las ocupó el perdedor. Así no se construye una lista de
+        jugadas por simulación: quien la necesite lee los bits de las casillas que le interesan.
     """
-    sim_moves = []
-    # Se trabaja con una copia del tablero para no alterar el estado real.
-    sim_board = board.clone()
-    while True:
-        possible_moves = sim_board.get_possible_moves()
-        if not possible_moves:
-            # Sin movimientos posibles (caso excepcional)
-            break
-        move = random.choice(possible_moves)
-        sim_board.place_piece(move[0], move[1], current_player)
-        sim_moves.append((move, current_player))
-        # Si el jugador actual ha ganado, se termina la simulación.
-        if sim_board.check_connection(current_player):
-            return current_player, sim_moves
-        # Alternamos jugadores: si es 1 pasa a 2, y viceversa.
-        current_player = 3 - current_player
-    # En caso de empate (muy poco probable en HEX), se devuelve None
-    return None, sim_moves
+    size = board.size
+    stones_p1 = random_fill(board.bitboard_p1, board.bitboard_p2, size, current_player)
+    if bitboard_connected(stones_p1, size, 1):
+        return 1, stones_p1
+    return 2, bitboard_masks(size)[0] & ~stones_p1
 
 
 # ------------------------------
 # Función para actualizar las estadísticas RAVE en el camino de backpropagation.
 # ------------------------------
-def update_rave(node: TreeNode, sim_moves: list, winner: int):
+def update_rave(node: TreeNode, simulations: int, winning_cells: list):
     """
     Para cada nodo en el camino (cada nodo en el árbol que participó en esta simulación),
     se actualizan las estadísticas RAVE: para cada movimiento (jugado por cualquiera de los jugadores)
     que aparece en la simulación, se suma un conteo y se incrementan las victorias si el jugador que
     realizó dicho movimiento es el ganador.
 
-    sim_moves: lista de tuplas (move, player) de la simulación.
+    Como todos los movimientos posibles aparecen en cada simulación, el conteo es uno solo
+    por nodo y solo las victorias se suman casilla por casilla.
+
+    simulations: cantidad de simulaciones que se registran.
+    winning_cells: casillas (fila * size + columna) que jugó el ganador de cada simulación.
+    """
+    node.rave_visits += simulations
+    rave_wins = node.rave_wins
+    for cell in winning_cells:
+        rave_wins[cell] += 1
+
+
+def backpropagate(
+    node: TreeNode,
+    visits: int,
+    wins_by_player: dict,
+    winning_cells: list,
+    simulations: int,
+):
+    """
+    Actualiza las estadísticas (MCTS y RAVE) desde node hasta la raíz: suma visits visitas,
+    los rollouts que ganó el jugador que realizó el movimiento de cada nodo y las estadísticas
+    RAVE de simulations simulaciones. Una pérdida virtual son visitas sin victorias ni RAVE.
     """
-    for move, player in sim_moves:
-        # Inicializa contadores si es la primera vez que se ve el movimiento.
-        if move not in node.rave_visits:
-            node.rave_visits[move] = 0
-            node.rave_wins[move] = 0
-        node.rave_visits[move] += 1
-        if player == winner:
-            node.rave_wins[move] += 1
+    while node is not None:
+        node.visits += visits
+        node.inv_sqrt_visits = 1 / math.sqrt(node.visits)
+        node.inv_visits = 1 / node.visits
+        # La recompensa son los rollouts que ganó el jugador que realizó el movimiento en el nodo.
+        node.wins += wins_by_player[node.player]
+        # Actualizamos las estadísticas RAVE en el nodo (si ya se expandió).
+        if node.rave_wins is not None:
+            update_rave(node, simulations, winning_cells)
+        node = node.parent
+
+
+# Iteraciones de la búsqueda entre dos consultas del reloj
+_CLOCK_INTERVAL = 16
+
+
+# ------------------------------
+# Búsqueda en procesos independientes (paralelización en la raíz)
+# ------------------------------
+def _search_worker(player, board, deadline: float, seed: int) -> dict:
+    """Ejecuta en un proceso hijo una búsqueda con su propio árbol y su propia semilla."""
+    random.seed(seed)
+    return player._search(board, deadline)
 
 
 # ------------------------------
 # Implementación del jugador de HEX con MCTS + RAVE
 # ------------------------------
 class MonteCarloHexPlayer(Player):
-    def __init__(self, player_id: int, time_limit: float = 1.0):
+    def __init__(self, player_id: int, time_limit: float = 1.0, num_workers: int = 1):
         """
         player_id: el identificador del jugador (1 o 2)
         time_limit: límite de tiempo (en segundos) para la búsqueda MCTS por jugada.
+        num_workers: procesos que buscan en paralelo (por defecto 1, búsqueda en este
+                     proceso; con más se crea un pool en cada jugada).
         """
         super().__init__(player_id)
         self.time_limit = time_limit
+        self.num_workers = num_workers
+        # Rollouts por hoja seleccionada: se retropropagan juntos, así que la selección
+        # y la expansión se pagan una vez por lote (paralelización en las hojas).
+        self.leaf_playouts = 1
+        # Visitas que necesita una transposición (la misma posición alcanzada por otro orden
+        # de jugadas) para que sus estadísticas sirvan de prior a un nodo nuevo.
+        self.tt_min_visits = 8
+        # Hojas seleccionadas por ronda antes de simular ninguna. Cada hoja en espera tiene
+        # una pérdida virtual (virtual_loss visitas sin victorias) en su camino, para que los
+        # descensos siguientes se repartan por otras ramas; 1 desactiva el lote.
+        self.tree_batch = 1
+        self.virtual_loss = 1
 
     def play(self, board: "HexBoard") -> tuple:
         """
         Se escoge el movimiento a partir de una búsqueda iterativa MCTS con RAVE.
         Debido a la naturaleza aleatoria y la posibilidad de tener un tiempo limitado,
         se realizan simulaciones (rollouts) hasta agotar el tiempo.
+
+        Con varios procesos, cada uno hace crecer su propio árbol durante el mismo tiempo
+        (paralelización en la raíz: el GIL no limita procesos distintos) y se suman las
+        visitas de cada movimiento de la raíz.
+        """
+        # El límite se fija antes de lanzar los procesos: su arranque cuenta en el tiempo.
+        deadline = time.monotonic() + self.time_limit
+        if self.num_workers == 1:
+            visits = self._search(board, deadline)
+        else:
+            # "fork" (si está disponible) evita volver a importar los módulos en cada
+            # proceso, que además heredan las tablas ya calculadas.
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context("fork" if "fork" in methods else None)
+            base_seed = random.getrandbits(32)
+            with context.Pool(self.num_workers) as pool:
+                results = pool.starmap(
+                    _search_worker,
+                    [
+                        (self, board, deadline, base_seed + i)
+                        for i in range(self.num_workers)
+                    ],
+                )
+            visits = Counter()
+            for result in results:
+                visits.update(result)
+
+        # Se selecciona el movimiento de la raíz con mayor número de visitas.
+        if not visits:
+            return random.choice(board.get_possible_moves())
+        return max(visits, key=visits.get)
+
+    def _search(self, board: "HexBoard", deadline: float) -> dict:
+        """
+        Ejecuta la búsqueda MCTS con RAVE hasta deadline (según time.monotonic()) y retorna
+        {movimiento: visitas} para los hijos de la raíz.
         """
         # Creamos la raíz del árbol a partir del estado actual.
         # NOTA: La raíz es un nodo "dummy" sin movimiento, y se asigna como jugador el opuesto
         # de self.player_id para que el próximo movimiento (al expandir) sea de self.player_id.
-        root = TreeNode(
-            board.clone(), move=None, parent=None, player=3 - self.player_id
-        )
+        root = TreeNode(board, move=None, parent=None, player=3 - self.player_id)
+
+        # Un solo tablero para toda la búsqueda: cada iteración coloca sus fichas y al
+        # final las deshace con undo(), en lugar de clonar el tablero en cada iteración.
+        sim_board = board.clone()
+        root_depth = len(sim_board.move_history)
+        # Tabla de transposiciones: hash Zobrist de la posición -> primer nodo que la alcanzó.
+        transpositions = {}
+
+        # El árbol está lleno de ciclos hijo-padre y crece en cada iteración: el recolector
+        # cíclico lo recorrería entero una y otra vez. Se pausa durante la búsqueda (la memoria
+        # del árbol se libera por conteo de referencias o al reactivarlo).
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            iterations = 0
 
-        # Tiempo inicial para controlar el límite.
-        start_time = time.time()
-        iterations = 0
-
-        while time.time() - start_time < self.time_limit:
-            iterations += 1
-            # Selección: comenzamos en la raíz y descendemos por el árbol hasta alcanzar un nodo
-            # con movimientos sin probar o un estado terminal.
-            node = root
-            board_copy = board.clone()
-            # Registro de movimientos realizados en la simulación (con el jugador que los hizo)
-            simulation_moves = []
-
-            # Fase de selección: avanzar mientras el nodo esté completamente expandido
-            while node.is_fully_expanded() and node.children:
-                # Seleccionamos el mejor hijo usando la combinación UCT+RAVE.
-                node = node.best_child()
-                if node.move is not None:
-                    board_copy.place_piece(node.move[0], node.move[1], node.player)
-                    simulation_moves.append((node.move, node.player))
-
-            # Fase de expansión: si el nodo actual posee movimientos sin intentar, se selecciona uno al azar.
-            if node.untried_moves:
-                move = random.choice(node.untried_moves)
-                # El siguiente jugador es el opuesto al que jugó en el nodo actual.
-                current_player = 3 - node.player
-                board_copy.place_piece(move[0], move[1], current_player)
-                simulation_moves.append((move, current_player))
-                # Se crea un nodo hijo para el movimiento expandido.
-                child_board = board_copy.clone()
-                child_node = TreeNode(child_board, move, node, player=current_player)
-                node.children[move] = child_node
-                # Se elimina el movimiento de los no probados.
-                node.untried_moves.remove(move)
-                # Continuamos la simulación desde el nuevo nodo.
-                node = child_node
-
-            # Fase de simulación: se realiza un rollout a partir del estado actual.
-            current_player = 3 - node.player  # El siguiente turno
-            winner, sim_moves = rollout(board_copy, current_player)
-            simulation_moves.extend(sim_moves)
-
-            # Fase de backpropagation: se actualizan las estadísticas (MCTS y RAVE) a lo largo del camino.
-            backprop_node = node
-            while backprop_node is not None:
-                backprop_node.visits += 1
-                # La recompensa se da si el jugador que realizó el movimiento en el nodo ganó.
-                if winner is not None and backprop_node.player == winner:
-                    backprop_node.wins += 1
-                # Actualizamos las estadísticas RAVE en el nodo.
-                update_rave(backprop_node, simulation_moves, winner)
-                backprop_node = backprop_node.parent
-
-        # Después de terminar las simulaciones, se selecciona el hijo de la raíz con mayor número de visitas.
-        best_move = None
-        best_visits = -1
-        for move, child in root.children.items():
-            if child.visits > best_visits:
-                best_visits = child.visits
-                best_move = move
-
-        return best_move
+            # El reloj se consulta cada _CLOCK_INTERVAL iteraciones: una iteración dura
+            # decenas de microsegundos, así que el límite se excede en menos de un milisegundo.
+            while iterations % _CLOCK_INTERVAL or time.monotonic() < deadline:
+                iterations += 1
+                # Selección y expansión de tree_batch hojas. Todas menos la última quedan en
+                # espera con una pérdida virtual (visitas sin victorias) en su camino, para que
+                # los descensos siguientes se repartan por otras ramas, y el tablero vuelve a
+                # la raíz; la última se simula enseguida.
+                pending = []
+                for _ in range(self.tree_batch - 1):
+                    node, simulation_moves = self._descend(
+                        root, sim_board, transpositions
+                    )
+                    backpropagate(node, self.virtual_loss, {1: 0, 2: 0}, [], 0)
+                    pending.append((node, simulation_moves))
+                    sim_board.undo(len(sim_board.move_history) - root_depth)
+                node, simulation_moves = self._descend(root, sim_board, transpositions)
+
+                # Simulación y backpropagation.
+                batch = self.leaf_playouts
+                wins_by_player, winning_cells = self._simulate(
+                    node, sim_board, simulation_moves
+                )
+                backpropagate(node, batch, wins_by_player, winning_cells, batch)
+                # Se deshacen las fichas de esta iteración: el tablero vuelve a la raíz.
+                sim_board.undo(len(sim_board.move_history) - root_depth)
+
+                # Hojas en espera: se rehace su camino y la pérdida virtual se cambia por el
+                # resultado real.
+                for node, simulation_moves in pending:
+                    for (row, col), player in simulation_moves:
+                        sim_board.place_piece(row, col, player)
+                    wins_by_player, winning_cells = self._simulate(
+                        node, sim_board, simulation_moves
+                    )
+                    backpropagate(
+                        node,
+                        batch - self.virtual_loss,
+                        wins_by_player,
+                        winning_cells,
+                        batch,
+                    )
+                    sim_board.undo(len(sim_board.move_history) - root_depth)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+        # Después de terminar las simulaciones, se retornan las visitas de cada hijo de la raíz.
+        return {move: child.visits for move, child in root.children.items()}
+
+    def _descend(
+        self, root: TreeNode, sim_board: "HexBoard", transpositions: dict
+    ) -> tuple:
+        """
+        Selecciona una hoja desde la raíz y la expande si tiene movimientos sin probar,
+        colocando en sim_board las fichas del camino. Retorna la hoja y la lista de
+        movimientos (move, player) aplicados para llegar a ella.
+        """
+        # Selección: comenzamos en la raíz y descendemos por el árbol hasta alcanzar un nodo
+        # con movimientos sin probar o un estado terminal.
+        node = root
+        # Registro de movimientos realizados en la simulación (con el jugador que los hizo)
+        simulation_moves = []
+
+        # Fase de selección: avanzar mientras el nodo esté completamente expandido
+        while node.is_fully_expanded() and node.children:
+            # Seleccionamos el mejor hijo usando la combinación UCT+RAVE.
+            node = node.best_child()
+            if node.move is not None:
+                sim_board.place_piece(node.move[0], node.move[1], node.player)
+                simulation_moves.append((node.move, node.player))
+
+        # Fase de expansión: si el nodo actual posee movimientos sin intentar, se selecciona uno al azar.
+        # Una posición ganada es terminal y no se expande: el ganador queda anotado en el
+        # tablero al colocar la ficha, así que basta leerlo (un tablero lleno de Hex siempre
+        # tiene ganador, por lo que no hace falta contar las casillas vacías).
+        if node.untried_moves is None and not sim_board.winner:
+            node.expand_lists(sim_board)
+        if node.untried_moves:
+            # Se saca un movimiento al azar intercambiándolo con el último: O(1) en lugar
+            # de random.choice + list.remove, que recorre la lista.
+            untried = node.untried_moves
+            idx = random.getrandbits(32) % len(untried)
+            untried[idx], untried[-1] = untried[-1], untried[idx]
+            move = untried.pop()
+            # El siguiente jugador es el opuesto al que jugó en el nodo actual.
+            current_player = node.player ^ 3
+            sim_board.place_piece(move[0], move[1], current_player)
+            simulation_moves.append((move, current_player))
+            # Se crea un nodo hijo para el movimiento expandido.
+            child_node = TreeNode(sim_board, move, node, player=current_player)
+            node.children[move] = child_node
+            # Si la posición ya se alcanzó por otro orden de jugadas, el nuevo nodo
+            # empieza con la mitad de las visitas de aquel y la misma tasa de victorias
+            # (sin superar las visitas del padre, que best_child usa como cota).
+            twin = transpositions.setdefault(sim_board.zobrist_hash, child_node)
+            if twin is not child_node and twin.visits >= self.tt_min_visits:
+                child_node.visits = min(twin.visits // 2, node.visits)
+                child_node.wins = twin.wins * child_node.visits * twin.inv_visits
+                child_node.inv_visits = 1 / child_node.visits
+                child_node.inv_sqrt_visits = math.sqrt(child_node.inv_visits)
+            # Continuamos la simulación desde el nuevo nodo.
+            node = child_node
+        return node, simulation_moves
+
+    def _simulate(
+        self, node: TreeNode, sim_board: "HexBoard", simulation_moves: list
+    ) -> tuple:
+        """
+        Realiza leaf_playouts rollouts desde la hoja node (la posición de sim_board) y
+        retorna ({jugador: rollouts ganados}, casillas que jugó el ganador de cada rollout).
+        Las casillas se calculan una sola vez para todo el camino.
+        """
+        current_player = node.player ^ 3  # El siguiente turno
+        size = sim_board.size
+        batch = self.leaf_playouts
+        # Casillas del árbol de cada jugador y casillas vacías de la hoja
+        tree_cells = {1: [], 2: []}
+        for (row, col), player in simulation_moves:
+            tree_cells[player].append(row * size + col)
+        leaf_cells = [row * size + col for row, col in sim_board._empty_cells()]
+        winning_cells = []
+        p1_wins = 0
+        for _ in range(batch):
+            winner, winner_stones = rollout(sim_board, current_player)
+            p1_wins += winner == 1
+            winning_cells += tree_cells[winner]
+            # Un carácter por casilla ("1" si es del ganador): el bitboard se desempaqueta
+            # una vez en lugar de desplazarlo para cada casilla.
+            owner = format(winner_stones, f"0{size * size}b")[::-1]
+            winning_cells += [cell for cell in leaf_cells if owner[cell] == "1"]
+        return {1: p1_wins, 2: batch - p1_wins}, winning_cells
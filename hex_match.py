@@ -1,11 +1,19 @@
 from hexboard import MyBoard
 
 from best_players import MonteCarloHexPlayer as RavePlayer
+from concurrent.futures import ProcessPoolExecutor
+import os
+import random
 import time
 from tabulate import tabulate
 
 
-def play_match(player1, player2, board_size):
+def play_match(player1, player2, board_size, verbose=False, sleep=0):
+    """
+    Play one game and return (winner_id, player1_time, player2_time).
+    With verbose, the board is printed after every move and the game pauses
+    `sleep` seconds per turn; tournaments leave both off so only AI time counts.
+    """
     board = MyBoard(board_size)
     current_player = player1
     turn = 1
@@ -13,9 +21,9 @@ def play_match(player1, player2, board_size):
     p2_time = 0
 
     while True:
-        start_time = time.time()
+        start_time = time.perf_counter()
         move = current_player.play(board)
-        end_time = time.time()
+        end_time = time.perf_counter()
 
         # Track time for the current player
         if current_player == player1:
@@ -25,13 +33,29 @@ def play_match(player1, player2, board_size):
 
         board.place_piece(move[0], move[1], current_player.player_id)
 
-        if board.check_connection(current_player.player_id):
-            return current_player.player_id, p1_time, p2_time
+        if verbose:
+            # Print the current state and board
+            board.print_board()
+            print(f"Turn {turn}: Player {current_player.player_id} placed at {move}")
+            if sleep:
+                time.sleep(sleep)
+
+        # Only the stone just placed can complete a connection, and place_piece
+        # records it in board.winner when it does: no search over the board here
+        if board.winner:
+            if verbose:
+                print(f"Player {board.winner} wins!")
+            return board.winner, p1_time, p2_time
 
         current_player = player2 if current_player == player1 else player1
         turn += 1
 
 
+def _seed_worker() -> None:
+    """Give each tournament process its own random stream (forked copies share one)."""
+    random.seed()
+
+
 def play_tournament(player1, player2, board_size, num_games: int = 10) -> None:
     """
     Play a tournament of multiple Hex games and track the results.
@@ -46,29 +70,42 @@ def play_tournament(player1, player2, board_size, num_games: int = 10) -> None:
     games_per_player = num_games // 2
     remaining_games = num_games % 2  # In case of odd number of games
 
-    for game in range(num_games):
-        print(f"\nGame {game + 1} of {num_games}")
-
-        # Determine starting player based on game number
-        if game < games_per_player:
-            first_player = player1
-            second_player = player2
-            print("Player 1 starts")
-        else:
-            first_player = player2
-            second_player = player1
-            print("Player 2 starts")
-
-        winner, p1_time, p2_time = play_match(first_player, second_player, board_size)
-        p1_total_time += p1_time
-        p2_total_time += p2_time
-
-        if winner == 1:
-            p1_wins += 1
-            print(f"Winner: Player 1 (Time: {p1_time:.2f}s)")
-        else:
-            p2_wins += 1
-            print(f"Winner: Player 2 (Time: {p2_time:.2f}s)")
+    # Games are independent, so each one runs in its own process, one per core.
+    # A player with num_workers > 1 already spreads every move over the cores with
+    # its own pool: running games side by side would then oversubscribe them and
+    # cut each time-limited search short, so those tournaments play one game at a
+    # time (the executor's workers are not daemonic, so the players' pools still
+    # start inside them).
+    starts = [game < games_per_player for game in range(num_games)]
+    first_players = [player1 if first else player2 for first in starts]
+    second_players = [player2 if first else player1 for first in starts]
+    parallel_players = any(
+        getattr(player, "num_workers", 1) > 1 for player in (player1, player2)
+    )
+    workers = 1 if parallel_players else min(num_games, os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers, initializer=_seed_worker) as executor:
+        results = executor.map(
+            play_match,
+            first_players,
+            second_players,
+            [board_size] * num_games,
+        )
+
+        for game, (player1_starts, (winner, p1_time, p2_time)) in enumerate(
+            zip(starts, results)
+        ):
+            print(f"\nGame {game + 1} of {num_games}")
+            print("Player 1 starts" if player1_starts else "Player 2 starts")
+
+            p1_total_time += p1_time
+            p2_total_time += p2_time
+
+            if winner == 1:
+                p1_wins += 1
+                print(f"Winner: Player 1 (Time: {p1_time:.2f}s)")
+            else:
+                p2_wins += 1
+                print(f"Winner: Player 2 (Time: {p2_time:.2f}s)")
 
     # Prepare data for the table
     headers = ["Metric", "Player 1", "Player 2"]
@@ -92,8 +129,7 @@ def play_game(board_size: int = 7) -> int:
     Play a game of Hex between two AI players
     Returns the winner's ID (1 or 2)
     """
-    # Initialize board and players
-    board = MyBoard(board_size)
+    # Initialize players
     # player1 = MCAEP(1, simulation_time=2.0)
     # player1 = MCSPlayer(1, simulation_time=2.0)
     # player1 = MCTHP(1, simulation_time=2.0)
@@ -103,30 +139,11 @@ def play_game(board_size: int = 7) -> int:
 
     player2 = RavePlayer(2, time_limit=2.0)
 
-    current_player = player1
-    turn = 1
-
-    while True:
-        # Get and execute the current player's move
-        move = current_player.play(board)
-        board.place_piece(move[0], move[1], current_player.player_id)
-
-        # Print the current state and board
-        board.print_board()
-        print(f"Turn {turn}: Player {current_player.player_id} placed at {move}")
-        time.sleep(1)
-
-        # Check for victory
-        if board.check_connection(current_player.player_id):
-            print(f"Player {current_player.player_id} wins!")
-            # return current_player.player_id
-            break
-
-        # Switch players
-        current_player = player2 if current_player == player1 else player1
-        turn += 1
+    # Show one game move by move, then measure the players over a tournament
+    winner, _, _ = play_match(player1, player2, board_size, verbose=True, sleep=1)
 
     play_tournament(player1, player2, board_size, num_games=10)
+    return winner
 
 
 if __name__ == "__main__":
@@ -1,21 +1,135 @@
 from basic_classes import HexBoard
-import os
+from functools import lru_cache
+import random
+import sys
+
+# Desplazamientos (fila, columna) de los seis vecinos hexagonales de una casilla
+NEIGHBOR_OFFSETS = ((0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1))
+
+
+@lru_cache(maxsize=None)
+def neighbor_table(size: int) -> tuple:
+    """Para cada casilla fila * size + columna, los índices de sus vecinos hexagonales."""
+    table = []
+    for row in range(size):
+        for col in range(size):
+            neighbors = []
+            for dr, dc in NEIGHBOR_OFFSETS:
+                new_row, new_col = row + dr, col + dc
+                if 0 <= new_row < size and 0 <= new_col < size:
+                    neighbors.append(new_row * size + new_col)
+            table.append(tuple(neighbors))
+    return tuple(table)
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(size: int) -> tuple:
+    """
+    Claves Zobrist de 64 bits para un tablero de lado `size`: keys[jugador][casilla]
+    y la clave de turno, que se combina en cada jugada para distinguir quién mueve.
+    """
+    rng = random.Random(size)
+    keys = {
+        player_id: tuple(rng.getrandbits(64) for _ in range(size * size))
+        for player_id in (1, 2)
+    }
+    return keys, rng.getrandbits(64)
+
+
+@lru_cache(maxsize=None)
+def union_links(size: int) -> dict:
+    """
+    {jugador: tabla} donde tabla[fila * size + columna] son los nodos con los que se une
+    una ficha nueva del jugador en esa casilla: sus vecinos hexagonales (si son fichas
+    propias) y, al final, los nodos virtuales de los bordes del jugador que toca
+    (size * size para el de inicio, size * size + 1 para el de meta).
+    """
+    cells = size * size
+    neighbors = neighbor_table(size)
+    links = {}
+    for player_id in (1, 2):
+        table = []
+        for idx in range(cells):
+            row, col = divmod(idx, size)
+            # Conexión vertical para el jugador 1, horizontal para el 2
+            edge_coord = row if player_id == 1 else col
+            edges = ()
+            if edge_coord == 0:
+                edges += (cells,)
+            if edge_coord == size - 1:
+                edges += (cells + 1,)
+            table.append(neighbors[idx] + edges)
+        links[player_id] = tuple(table)
+    return links
 
 
 class MyBoard(HexBoard):
     def __init__(self, size: int):
         super().__init__(size)
+        # Bitboards por jugador: el bit fila * size + columna indica una ficha
+        self.bitboards = {1: 0, 2: 0}
+        # Tablas por tamaño (uniones y claves Zobrist), de solo lectura: se guardan en
+        # el tablero para no consultarlas en cada jugada y las copias las comparten
+        self._zobrist = zobrist_keys(size)
+        self._links = union_links(size)
+        # Union-find por jugador sobre las casillas, más dos nodos virtuales:
+        # size * size (borde de inicio) y size * size + 1 (borde meta)
+        cells = size * size
+        self.uf_parent = {1: list(range(cells + 2)), 2: list(range(cells + 2))}
+        self.uf_rank = {1: [0] * (cells + 2), 2: [0] * (cells + 2)}
+        # Pila de jugadas (fila, columna, jugador, uniones, ganó) para poder deshacerlas
+        self.move_history = []
+        # Jugador que ya conectó sus dos lados (0 si ninguno): se fija en place_piece
+        self.winner = 0
+        # Hash Zobrist de la posición, actualizado con XOR en cada jugada
+        self.zobrist_hash = 0
+        # Casillas vacías y, por índice fila * size + columna, la posición de cada una en
+        # la lista (sin significado si está ocupada), para quitarlas en O(1)
+        self._empties = [(row, col) for row in range(size) for col in range(size)]
+        self._empty_index = list(range(size * size))
+
+    @property
+    def bitboard_p1(self) -> int:
+        """Fichas del jugador 1 como bitboard."""
+        return self.bitboards[1]
+
+    @property
+    def bitboard_p2(self) -> int:
+        """Fichas del jugador 2 como bitboard."""
+        return self.bitboards[2]
 
     def clone(self) -> "MyBoard":
         """Devuelve una copia del tablero actual"""
-        new_board = MyBoard(self.size)
+        # Sin pasar por __init__: todos los campos se copian a continuación, así que
+        # construir un tablero vacío solo para sobrescribirlo duplicaría el trabajo.
+        new_board = MyBoard.__new__(MyBoard)
+        new_board.size = self.size
         new_board.board = [row[:] for row in self.board]
         new_board.player_positions = {
             1: self.player_positions[1].copy(),
             2: self.player_positions[2].copy(),
         }
+        new_board.bitboards = self.bitboards.copy()
+        new_board._zobrist = self._zobrist
+        new_board._links = self._links
+        new_board.uf_parent = {1: self.uf_parent[1][:], 2: self.uf_parent[2][:]}
+        new_board.uf_rank = {1: self.uf_rank[1][:], 2: self.uf_rank[2][:]}
+        new_board.move_history = self.move_history[:]
+        new_board.winner = self.winner
+        new_board.zobrist_hash = self.zobrist_hash
+        new_board._empties = self._empties[:]
+        new_board._empty_index = self._empty_index[:]
         return new_board
 
+    def _find(self, player_id: int, idx: int) -> int:
+        """Representante del conjunto de idx."""
+        # Sin compresión de camino: así cada unión se deshace restaurando una sola
+        # entrada; la unión por rango mantiene los árboles en altura O(log n).
+        parent = self.uf_parent[player_id]
+        while parent[idx] != idx:
+            idx = parent[idx]
+        return idx
+
     def place_piece(self, row: int, col: int, player_id: int) -> bool:
         """Coloca una ficha si la casilla está vacía."""
         # Verificar si la posición está dentro del tablero
@@ -30,98 +144,119 @@ class MyBoard(HexBoard):
         self.board[row][col] = player_id
         # Registrar la posición para el jugador
         self.player_positions[player_id].add((row, col))
+        idx = row * self.size + col
+        self.bitboards[player_id] |= 1 << idx
+        # Quitar la casilla de las vacías: la última ocupa su lugar
+        i = self._empty_index[idx]
+        last = self._empties.pop()
+        if i < len(self._empties):
+            self._empties[i] = last
+            self._empty_index[last[0] * self.size + last[1]] = i
+        keys, side_key = self._zobrist
+        self.zobrist_hash ^= keys[player_id][idx] ^ side_key
+
+        # Unir con las fichas propias adyacentes y con los bordes virtuales (unión
+        # por rango). La raíz de la ficha nueva se sigue a lo largo de las uniones, así
+        # que solo hace falta buscar la del otro conjunto. Cada unión se anota como
+        # (raíz_absorbida, raíz_nueva, rango_incrementado) para poder deshacerla.
+        cells = self.size * self.size
+        stones = self.bitboards[player_id]
+        parent = self.uf_parent[player_id]
+        rank = self.uf_rank[player_id]
+        root = idx
+        unions = []
+        for other in self._links[player_id][idx]:
+            # Los vecinos cuentan si son fichas propias; los bordes virtuales, siempre
+            if other < cells and not stones >> other & 1:
+                continue
+            while parent[other] != other:
+                other = parent[other]
+            if other == root:
+                continue
+            if rank[root] < rank[other]:
+                parent[root] = other
+                unions.append((root, other, False))
+                root = other
+            else:
+                parent[other] = root
+                bumped = rank[root] == rank[other]
+                if bumped:
+                    rank[root] += 1
+                unions.append((other, root, bumped))
+        # Solo una jugada que une conjuntos puede conectar los dos bordes virtuales, y
+        # entonces ambos quedan en el conjunto de la ficha nueva: basta comparar sus
+        # raíces con root, y la del borde meta solo si la del de inicio coincide.
+        won = False
+        if unions and not self.winner:
+            start = cells
+            while parent[start] != start:
+                start = parent[start]
+            if start == root:
+                goal = cells + 1
+                while parent[goal] != goal:
+                    goal = parent[goal]
+                won = goal == root
+                if won:
+                    self.winner = player_id
+        self.move_history.append((row, col, player_id, unions, won))
 
         return True
 
+    def undo(self, count: int = 1) -> None:
+        """Deshace las últimas `count` fichas colocadas (en orden inverso)."""
+        for _ in range(count):
+            row, col, player_id, unions, won = self.move_history.pop()
+            if won:
+                self.winner = 0
+            parent = self.uf_parent[player_id]
+            rank = self.uf_rank[player_id]
+            for old_root, new_root, bumped in reversed(unions):
+                parent[old_root] = old_root
+                if bumped:
+                    rank[new_root] -= 1
+            self.board[row][col] = 0
+            self.player_positions[player_id].discard((row, col))
+            idx = row * self.size + col
+            self._empty_index[idx] = len(self._empties)
+            self._empties.append((row, col))
+            self.bitboards[player_id] &= ~(1 << idx)
+            keys, side_key = self._zobrist
+            self.zobrist_hash ^= keys[player_id][idx] ^ side_key
+
+    def unplace_piece(self, row: int, col: int, player_id: int) -> None:
+        """Retira la ficha de la última jugada, que debe ser (row, col) de player_id."""
+        # Las uniones solo se pueden deshacer en orden inverso, así que únicamente
+        # se admite retirar la última ficha colocada
+        if not self.move_history or self.move_history[-1][:3] != (row, col, player_id):
+            raise ValueError("Solo se puede retirar la última ficha colocada")
+        self.undo()
+
     def get_possible_moves(self) -> list:
         """Devuelve todas las casillas vacías como tuplas (fila, columna)."""
-        possible_moves = []
-        for row in range(self.size):
-            for col in range(self.size):
-                if self.board[row][col] == 0:  # Si la casilla está vacía
-                    possible_moves.append((row, col))
-        return possible_moves
+        return list(self._empties)
+
+    def _empty_cells(self) -> list:
+        """
+        Lista interna de casillas vacías, sin copiar, para los bucles calientes de
+        los jugadores. place_piece y undo la reordenan: no debe modificarse, ni
+        recorrerse mientras se colocan o deshacen fichas.
+        """
+        return self._empties
 
     def print_board(self):
         """Imprime el tablero actual en formato hexagonal"""
-        # Clear console before printing
-        os.system("cls" if os.name == "nt" else "clear")
+        symbols = {0: ". ", 1: "R ", 2: "B "}  # Rojo (norte-sur), azul (este-oeste)
 
+        # Limpiar la consola con la secuencia ANSI (sin lanzar un proceso) y
+        # escribir todo el tablero de una sola vez
+        lines = []
         for i in range(self.size):
-            # Print leading spaces for the hex layout
-            print(" " * i, end="")
-
-            # Print the row
-            for j in range(self.size):
-                cell = self.board[i][j]
-                if cell == 0:
-                    print(". ", end="")
-                elif cell == 1:
-                    print("R ", end="")  # Red player (North-South)
-                else:
-                    print("B ", end="")  # Blue player (East-West)
-            print()  # New line after each row
+            # Espacios iniciales para la forma hexagonal
+            lines.append(" " * i + "".join(symbols[cell] for cell in self.board[i]))
+        sys.stdout.write("\x1b[2J\x1b[H" + "\n".join(lines) + "\n")
 
     def check_connection(self, player_id: int) -> bool:
         """Verifica si el jugador ha conectado sus dos lados"""
-        if player_id == 1:  # Jugador 1 (Rojo) conecta norte-sur
-            # Encontrar todas las piezas en la primera fila
-            start_positions = [
-                (0, col) for col in range(self.size) if self.board[0][col] == 1
-            ]
-            target_row = self.size - 1
-
-            # BFS desde cada pieza inicial
-            for start in start_positions:
-                visited = set()
-                queue = [start]
-
-                while queue:
-                    row, col = queue.pop(0)
-                    if row == target_row:  # Llegó al otro lado
-                        return True
-
-                    # Revisar las 6 casillas adyacentes
-                    for dr, dc in [(0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1)]:
-                        new_row, new_col = row + dr, col + dc
-
-                        if (
-                            0 <= new_row < self.size
-                            and 0 <= new_col < self.size
-                            and self.board[new_row][new_col] == 1
-                            and (new_row, new_col) not in visited
-                        ):
-                            visited.add((new_row, new_col))
-                            queue.append((new_row, new_col))
-
-        else:  # Jugador 2 (Azul) conecta este-oeste
-            # Encontrar todas las piezas en la primera columna
-            start_positions = [
-                (row, 0) for row in range(self.size) if self.board[row][0] == 2
-            ]
-            target_col = self.size - 1
-
-            # BFS desde cada pieza inicial
-            for start in start_positions:
-                visited = set()
-                queue = [start]
-
-                while queue:
-                    row, col = queue.pop(0)
-                    if col == target_col:  # Llegó al otro lado
-                        return True
-
-                    # Revisar las 6 casillas adyacentes
-                    for dr, dc in [(0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1)]:
-                        new_row, new_col = row + dr, col + dc
-
-                        if (
-                            0 <= new_row < self.size
-                            and 0 <= new_col < self.size
-                            and self.board[new_row][new_col] == 2
-                            and (new_row, new_col) not in visited
-                        ):
-                            visited.add((new_row, new_col))
-                            queue.append((new_row, new_col))
-
-        return False
+        # Los bordes de cada jugador están unidos a dos nodos virtuales; place_piece
+        # comprueba si quedaron en el mismo conjunto y lo anota en winner.
+        return self.winner == player_id
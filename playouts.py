@@ -0,0 +1,114 @@
+import random
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def bitboard_masks(size: int) -> tuple:
+    """
+    Máscaras precalculadas para un tablero de lado `size`, donde la casilla
+    (fila, columna) corresponde al bit fila * size + columna:
+      - full: todas las casillas del tablero.
+      - not_first_col / not_last_col: evitan que los desplazamientos den la vuelta de fila.
+      - edges: {player_id: (borde_inicio, borde_meta)}.
+    """
+    full = (1 << (size * size)) - 1
+    first_col = sum(1 << (row * size) for row in range(size))
+    last_col = first_col << (size - 1)
+    top_row = (1 << size) - 1
+    bottom_row = top_row << (size * (size - 1))
+    edges = {1: (top_row, bottom_row), 2: (first_col, last_col)}
+    return full, full & ~first_col, full & ~last_col, edges
+
+
+def bitboard_connected(stones: int, size: int, player_id: int) -> bool:
+    """
+    Verifica si las fichas `stones` (bitboard) de player_id conectan sus dos lados.
+
+    Inundación bit-paralela: en cada paso la frontera se expande a sus 6 vecinos
+    hexagonales con desplazamientos de bits y se intersecta con las fichas propias,
+    hasta llegar al borde meta o a un punto fijo.
+    """
+    _, not_first_col, not_last_col, edges = bitboard_masks(size)
+    start_edge, goal_edge = edges[player_id]
+    diag = size - 1
+    frontier = stones & start_edge
+    while frontier:
+        if frontier & goal_edge:
+            return True
+        grown = (
+            frontier
+            | ((frontier << 1) & not_first_col)  # (0, 1)
+            | ((frontier >> 1) & not_last_col)  # (0, -1)
+            | (frontier << size)  # (1, 0)
+            | (frontier >> size)  # (-1, 0)
+            | ((frontier << diag) & not_last_col)  # (1, -1)
+            | ((frontier >> diag) & not_first_col)  # (-1, 1)
+        ) & stones
+        if grown == frontier:
+            return False
+        frontier = grown
+    return False
+
+
+def bitboard_adjacencies(stones: int, size: int) -> int:
+    """
+    Cuenta, sumando sobre cada ficha de `stones`, cuántos de sus vecinos hexagonales
+    también están en `stones`.
+
+    Cada par de fichas adyacentes aparece una vez al desplazar el bitboard en las
+    direcciones (0, 1), (1, 0) y (1, -1): basta contar esos pares y duplicarlos.
+    """
+    _, not_first_col, not_last_col, _ = bitboard_masks(size)
+    pairs = (
+        (stones & (stones << 1) & not_first_col).bit_count()  # (0, 1)
+        + (stones & (stones << size)).bit_count()  # (1, 0)
+        + (stones & (stones << (size - 1)) & not_last_col).bit_count()  # (1, -1)
+    )
+    return 2 * pairs
+
+
+@lru_cache(maxsize=None)
+def cell_bits(size: int) -> tuple:
+    """El bit de cada casilla, en orden: cell_bits(size)[fila * size + columna]."""
+    return tuple(1 << idx for idx in range(size * size))
+
+
+def random_fill(
+    bits_p1: int, bits_p2: int, size: int, current_player: int, rng=random
+) -> int:
+    """
+    Rellena al azar las casillas vacías alternando jugadores, empezando por
+    current_player, y retorna las fichas del jugador 1 en el tablero lleno (las del
+    jugador 2 son el resto).
+
+    Alternando jugadores, el jugador 1 recibe la mitad de las casillas vacías (la mayor
+    si mueve primero): basta elegir ese subconjunto con un Fisher-Yates parcial de
+    k pasos, con índices getrandbits(32) % n (sesgo despreciable en pocos cientos
+    de casillas). Las fichas se juntan con sum(), que equivale a OR en bits distintos.
+    """
+    empty = bitboard_masks(size)[0] & ~(bits_p1 | bits_p2)
+    order = [bit for bit in cell_bits(size) if empty & bit]
+    n = len(order)
+    k = (n + 1) // 2 if current_player == 1 else n // 2
+
+    bits = rng.getrandbits
+    for i in range(k):
+        j = i + bits(32) % (n - i)
+        order[i], order[j] = order[j], order[i]
+
+    return bits_p1 | sum(order[:k])
+
+
+def random_playout(
+    bits_p1: int, bits_p2: int, size: int, current_player: int, rng=random
+) -> int:
+    """
+    Simula una partida aleatoria desde la posición dada por los bitboards y retorna el ganador.
+
+    En lugar de comprobar la conexión tras cada jugada, se reparten las casillas vacías
+    al azar (random_fill) y se rellena el tablero. En Hex un tablero lleno tiene
+    exactamente un ganador, y es el mismo jugador que habría conectado primero jugando
+    en ese orden, así que basta una sola comprobación.
+    """
+    stones = random_fill(bits_p1, bits_p2, size, current_player, rng)
+    return 1 if bitboard_connected(stones, size, 1) else 2
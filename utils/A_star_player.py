@@ -1,50 +1,63 @@
+from collections import OrderedDict
 from heapq import heappop, heappush
 from basic_classes import Player, HexBoard
+from hexboard import neighbor_table
 import random
 
 
 class AStarPlayer(Player):
+    # Cantidad de posiciones recientes cuyo camino se recuerda
+    path_cache_size = 64
+
     def __init__(self, player_id):
         super().__init__(player_id)
+        # Caché LRU (tamaño, hash Zobrist) -> camino de A*: el grafo y la búsqueda
+        # dependen solo de la posición, que se repite entre partidas de un torneo
+        self._path_cache = OrderedDict()
 
-    def _pos_to_node(self, pos: tuple) -> str:
-        """Convierte una posición (fila, columna) a un identificador de nodo."""
-        return f"pos_{pos[0]}_{pos[1]}"
-
-    def _node_to_pos(self, node: str) -> tuple:
-        """Convierte el identificador del nodo a una posición (fila, columna)."""
-        if node in ["start", "end"]:
-            return None
-        _, row, col = node.split("_")
-        return (int(row), int(col))
+    def _sentinels(self, size: int) -> tuple:
+        """Índices de los nodos 'start' y 'end', a continuación de las casillas."""
+        return size * size, size * size + 1
 
     def play(self, board: HexBoard) -> tuple:
         """
         Decide el siguiente movimiento usando A*.
         """
-        graph = self._initialize_graph(board)
-        path = self._astar(graph, "start", "end", board.size, board)
-
-        # # Buscar la primera posición vacía en el camino (excluyendo nodos especiales)
-        # for node in path:
-        #     pos = self._node_to_pos(node)
-        #     if pos is not None and board.board[pos[0]][pos[1]] == 0:
-        #         return pos
+        path = self._shortest_path(board)
 
         # Escoger aleatoriamente una posición vacía en el camino (excluyendo nodos especiales)
-        valid_positions = [
-            self._node_to_pos(node)
-            for node in path
-            if self._node_to_pos(node) is not None
-            and board.board[self._node_to_pos(node)[0]][self._node_to_pos(node)[1]] == 0
-        ]
+        # Cada nodo se convierte una sola vez; 'start' y 'end' son los índices
+        # a partir de size * size
+        size = board.size
+        valid_positions = []
+        for node in path:
+            if node >= size * size:
+                continue
+            row, col = divmod(node, size)
+            if board.board[row][col] == 0:
+                valid_positions.append((row, col))
         if valid_positions:
             return random.choice(valid_positions)
 
         # Si no se encontró, devolver algún movimiento válido
         return board.get_possible_moves()[0]
 
-    def _heuristic(self, node: str, size: int, board: HexBoard) -> int:
+    def _shortest_path(self, board: HexBoard) -> list:
+        """Camino de A* para la posición, construyendo el grafo solo si no está en caché."""
+        key = (board.size, board.zobrist_hash)
+        path = self._path_cache.get(key)
+        if path is not None:
+            self._path_cache.move_to_end(key)
+            return path
+
+        graph = self._initialize_graph(board)
+        path = self._astar(graph, *self._sentinels(board.size), board.size, board)
+        self._path_cache[key] = path
+        if len(self._path_cache) > self.path_cache_size:
+            self._path_cache.popitem(last=False)
+        return path
+
+    def _heuristic(self, node: int, size: int, board: HexBoard) -> int:
         """
         Heurística mejorada:
          - Para el jugador 1 (conecta arriba a abajo): la distancia restante es (size - 1 - fila)
@@ -53,9 +66,9 @@ class AStarPlayer(Player):
          - Penalidad adicional por estar junto a fichas del otro jugador.
          - Bonificación por estar junto a fichas propias conectadas.
         """
-        if node in ["start", "end"]:
+        if node >= size * size:  # Nodos especiales 'start' y 'end'
             return 0
-        pos = self._node_to_pos(node)
+        pos = divmod(node, size)
         center = size // 2
         distance_from_center = abs(pos[0] - center) + abs(pos[1] - center)
 
@@ -63,13 +76,13 @@ class AStarPlayer(Player):
         penalty = 0
         bonus = 0
         opponent_id = 3 - self.player_id
-        for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]:
-            nr, nc = pos[0] + dr, pos[1] + dc
-            if 0 <= nr < size and 0 <= nc < size:
-                if board.board[nr][nc] == opponent_id:
-                    penalty += 2  # Penalización por cada ficha del oponente adyacente
-                elif board.board[nr][nc] == self.player_id:
-                    bonus -= 1  # Bonificación por cada ficha propia adyacente
+        # Vecinos precalculados por tamaño: sin lista de direcciones ni límites por llamada
+        for neighbor in neighbor_table(size)[pos[0] * size + pos[1]]:
+            value = board.board[neighbor // size][neighbor % size]
+            if value == opponent_id:
+                penalty += 2  # Penalización por cada ficha del oponente adyacente
+            elif value == self.player_id:
+                bonus -= 1  # Bonificación por cada ficha propia adyacente
 
         if self.player_id == 1:
             # Conexión de arriba a abajo
@@ -78,93 +91,107 @@ class AStarPlayer(Player):
             # Conexión de izquierda a derecha
             return max(0, size - 1 - pos[1]) + distance_from_center + penalty + bonus
 
-    def _initialize_graph(self, board: HexBoard) -> dict:
+    def _initialize_graph(self, board: HexBoard) -> tuple:
         """
-        Inicializa la representación en grafo del tablero Hex.
+        Inicializa la representación en grafo del tablero Hex, en formato CSR:
+        (indptr, indices, weights). Las aristas que salen del nodo u son
+        indices[indptr[u]:indptr[u + 1]], con sus costos en las mismas posiciones
+        de weights.
         """
         size = board.size
-        graph = {"start": {}, "end": {}}
+        cells = size * size
+        start, end = self._sentinels(size)
+        # Estado de cada casilla, por índice de nodo
+        state = [value for row in board.board for value in row]
+        opponent = 3 - self.player_id
+        # Costo de entrar en una casilla según su estado: 1 si está vacía, 0 si es
+        # nuestra; a las del oponente no llega ninguna arista
+        cost = {0: 1, self.player_id: 0}
 
-        # Agregar aristas desde 'start' a las celdas del borde de inicio
         if self.player_id == 1:  # Jugador 1 (arriba a abajo)
-            for col in range(size):
-                node = self._pos_to_node((0, col))
-                if board.board[0][col] == 0:  # Casilla vacía
-                    graph["start"][node] = 1
-                elif board.board[0][col] == self.player_id:  # Nuestra ficha
-                    graph["start"][node] = 0
+            first_edge = range(size)
+            goal_edge = range(cells - size, cells)
         else:  # Jugador 2 (izquierda a derecha)
-            for row in range(size):
-                node = self._pos_to_node((row, 0))
-                if board.board[row][0] == 0:
-                    graph["start"][node] = 1
-                elif board.board[row][0] == self.player_id:
-                    graph["start"][node] = 0
-
-        # Agregar aristas desde las celdas del borde de meta a 'end'
-        if self.player_id == 1:
-            for col in range(size):
-                node = self._pos_to_node((size - 1, col))
-                if board.board[size - 1][col] == self.player_id:
-                    graph[node] = {"end": 0}
-                elif board.board[size - 1][col] == 0:
-                    graph[node] = {"end": 1}
-        else:
-            for row in range(size):
-                node = self._pos_to_node((row, size - 1))
-                if board.board[row][size - 1] == self.player_id:
-                    graph[node] = {"end": 0}
-                elif board.board[row][size - 1] == 0:
-                    graph[node] = {"end": 1}
-
-        # Agregar aristas entre posiciones internas del tablero
-        for row in range(size):
-            for col in range(size):
-                curr_node = self._pos_to_node((row, col))
-                if curr_node not in graph:
-                    graph[curr_node] = {}
-
-                # Solo considerar casillas vacías o con nuestra ficha
-                if board.board[row][col] != 3 - self.player_id:
-                    for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]:
-                        nr, nc = row + dr, col + dc
-                        if 0 <= nr < size and 0 <= nc < size:
-                            next_node = self._pos_to_node((nr, nc))
-                            neighbor_state = board.board[nr][nc]
-
-                            if neighbor_state == 0:
-                                graph[curr_node][next_node] = 1
-                            elif neighbor_state == self.player_id:
-                                graph[curr_node][next_node] = 0
-
-        return graph
+            first_edge = range(0, cells, size)
+            goal_edge = range(size - 1, cells, size)
+        is_goal = bytearray(cells)
+        for node in goal_edge:
+            is_goal[node] = 1
+
+        indptr = [0]
+        indices = []
+        weights = []
+
+        # Aristas entre posiciones del tablero, y desde el borde de meta a 'end'
+        neighbors = neighbor_table(size)
+        for node in range(cells):
+            # Solo considerar casillas vacías o con nuestra ficha
+            if state[node] != opponent:
+                for next_node in neighbors[node]:
+                    step_cost = cost.get(state[next_node])
+                    if step_cost is not None:
+                        indices.append(next_node)
+                        weights.append(step_cost)
+                if is_goal[node]:
+                    indices.append(end)
+                    weights.append(cost[state[node]])
+            indptr.append(len(indices))
+
+        # Aristas desde 'start' a las celdas del borde de inicio
+        for node in first_edge:
+            if state[node] != opponent:
+                indices.append(node)
+                weights.append(cost[state[node]])
+        indptr.append(len(indices))
+
+        # 'end' no tiene aristas de salida
+        indptr.append(len(indices))
+        return indptr, indices, weights
 
     def _astar(
-        self, graph: dict, start: str, end: str, size: int, board: HexBoard
+        self, graph: tuple, start: int, end: int, size: int, board: HexBoard
     ) -> list:
         """
         Encuentra el camino más corto de start a end utilizando el algoritmo A*.
         """
-        # Cada entrada en la cola es (f, g, nodo_actual, camino)
-        # f = g + h, donde g es el costo acumulado y h es la heurística
-        frontier = [(self._heuristic(start, size, board), 0, start, [start])]
-        visited = set()
+        indptr, indices, weights = graph
+        num_nodes = len(indptr) - 1
+
+        # El tablero no cambia durante la búsqueda: la heurística de cada nodo se
+        # calcula una sola vez, en lugar de en cada inserción en la cola
+        h = [self._heuristic(node, size, board) for node in range(num_nodes)]
+
+        # Cada entrada en la cola es (f, g, nodo_actual)
+        # f = g + h, donde g es el costo acumulado y h es la heurística. El camino no
+        # viaja en la cola: cada nodo guarda de dónde se llegó a él con el menor g, y
+        # se reconstruye una sola vez al llegar a la meta.
+        frontier = [(h[start], 0, start)]
+        came_from = [-1] * num_nodes
+        best_g = [float("inf")] * num_nodes
+        best_g[start] = 0
+        # Nodos ya cerrados, marcados en un arreglo indexado por nodo
+        visited = bytearray(num_nodes)
 
         while frontier:
-            f, g, current, path = heappop(frontier)
+            f, g, current = heappop(frontier)
 
-            if current in visited:
+            if visited[current]:
                 continue
-            visited.add(current)
+            visited[current] = 1
 
             if current == end:
-                return path
-
-            for neighbor, step_cost in graph.get(current, {}).items():
-                if neighbor not in visited:
-                    new_g = g + step_cost
-                    new_f = new_g + self._heuristic(neighbor, size, board)
-                    new_path = path + [neighbor]
-                    heappush(frontier, (new_f, new_g, neighbor, new_path))
+                path = [current]
+                while current != start:
+                    current = came_from[current]
+                    path.append(current)
+                return path[::-1]
+
+            for i in range(indptr[current], indptr[current + 1]):
+                neighbor = indices[i]
+                new_g = g + weights[i]
+                if not visited[neighbor] and new_g < best_g[neighbor]:
+                    best_g[neighbor] = new_g
+                    came_from[neighbor] = current
+                    heappush(frontier, (new_g + h[neighbor], new_g, neighbor))
 
         return []
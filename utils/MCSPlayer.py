@@ -1,64 +1,368 @@
 import math
-from dataclasses import dataclass
+import multiprocessing
+from collections import Counter, deque
+from functools import lru_cache
+from heapq import heappush, heappop, nlargest
 from typing import Optional, Tuple, List
 import time
 from basic_classes import Player
+from hexboard import neighbor_table, zobrist_keys
+from playouts import bitboard_connected, random_fill, random_playout
 import random
 
 
-@dataclass
-class Node:
-    move: Optional[Tuple[int, int]]  # The move that led to this state
-    parent: Optional["Node"]
-    player_id: int  # Player who will make the next move
-    visits: int = 0
-    wins: int = 0
-    children: List["Node"] = None
-
-    def add_children(self, moves: List[Tuple[int, int]], player_id: int):
-        self.children = [Node(move=m, parent=self, player_id=player_id) for m in moves]
-
-    def uct_value(self, exploration_constant: float = 1.41) -> float:
-        if self.visits == 0:
-            return float("inf")
-        exploitation = self.wins / self.visits
-        exploration = exploration_constant * math.sqrt(
-            math.log(self.parent.visits) / self.visits
-        )
-        return exploitation + exploration
+@lru_cache(maxsize=None)
+def edge_cells(size: int, player_id: int) -> tuple:
+    """
+    (start cells, goal cells) of player_id: the top and bottom rows for player 1
+    (vertical connection), the left and right columns for player 2 (horizontal)
+    """
+    last = size - 1
+    if player_id == 1:
+        start = tuple((0, col) for col in range(size))
+        goal = frozenset((last, col) for col in range(size))
+    else:
+        start = tuple((row, 0) for row in range(size))
+        goal = frozenset((row, last) for row in range(size))
+    return start, goal
+
+
+@lru_cache(maxsize=None)
+def position_base_scores(size: int, player_id: int) -> tuple:
+    """
+    Board-independent part of MCT_Heuristic_Player's score for each cell
+    row * size + col: minus the distance to the goal edge plus the center bonus
+    """
+    center = size // 2
+    scores = []
+    for row in range(size):
+        for col in range(size):
+            # Vertical connection: distance to bottom; horizontal: to right edge
+            goal_dist = size - 1 - (row if player_id == 1 else col)
+            center_dist = abs(row - center) + abs(col - center)
+            scores.append(-goal_dist + (size - center_dist) / 2)
+    return tuple(scores)
+
+
+@lru_cache(maxsize=None)
+def goal_distances(size: int, player_id: int) -> tuple:
+    """Manhattan distance from each cell row * size + col to player_id's goal edge"""
+    if player_id == 1:  # Vertical connection: goal is the bottom row
+        return tuple(size - 1 - row for row in range(size) for _ in range(size))
+    return tuple(size - 1 - col for _ in range(size) for col in range(size))
+
+
+# Tables of 1 / n and 1 / sqrt(n) (0 for n = 0) shared by every UCT evaluation,
+# grown on demand up to _INVERSE_LIMIT entries; larger visit counts are divided
+# directly.
+_INVERSE_LIMIT = 1 << 20
+_inverse = [0.0]
+_inverse_sqrt = [0.0]
+
+
+def _inverse_tables(n: int) -> Optional[Tuple[List[float], List[float]]]:
+    """Returns the tables covering 0..n, or None if n reaches _INVERSE_LIMIT"""
+    if n >= _INVERSE_LIMIT:
+        return None
+    if n >= len(_inverse):
+        new = range(len(_inverse), 2 * n + 1)
+        _inverse.extend(1.0 / v for v in new)
+        _inverse_sqrt.extend(1.0 / math.sqrt(v) for v in new)
+    return _inverse, _inverse_sqrt
+
+
+class MCTSTree:
+    """
+    Struct-of-arrays MCTS tree: node i is the index i of every field list.
+    Children of a node are stored contiguously, so they are identified by
+    first_child[i] and num_children[i] instead of a list of objects.
+    unvisited_head[i] is a cursor over those children: every child before it
+    has already been visited.
+
+    The field lists are preallocated and nodes are taken from them with a bump
+    pointer (n_nodes), so reset() reuses the storage for the next search.
+    hash[i] is the Zobrist hash of the node's position when the search sets it.
+    amaf_visits[i] / amaf_wins[i] are the all-moves-as-first statistics of the
+    move leading to node i: playouts below its parent in which the same player
+    took that cell at any point.
+    """
+
+    def __init__(self, root_player_id: int, capacity: int = 1 << 12):
+        self.visits: List[int] = [0] * capacity
+        self.wins: List[float] = [0] * capacity
+        self.parent: List[int] = [-1] * capacity
+        self.first_child: List[int] = [-1] * capacity
+        self.num_children: List[int] = [0] * capacity
+        self.unvisited_head: List[int] = [-1] * capacity
+        # Move that led to the node, and player who makes the next move from it
+        self.move: List[Optional[Tuple[int, int]]] = [None] * capacity
+        self.player_id: List[int] = [0] * capacity
+        self.hash: List[int] = [0] * capacity
+        self.amaf_visits: List[int] = [0] * capacity
+        self.amaf_wins: List[float] = [0] * capacity
+        self.reset(root_player_id)
+
+    def reset(self, root_player_id: int) -> None:
+        """Drops every node but a fresh root, keeping the allocated storage"""
+        self.n_nodes = 1
+        self.visits[0] = 0
+        self.wins[0] = 0
+        self.first_child[0] = -1
+        self.num_children[0] = 0
+        self.unvisited_head[0] = -1
+        self.player_id[0] = root_player_id
+        self.hash[0] = 0
+
+    def _grow(self, min_capacity: int) -> None:
+        capacity = len(self.visits)
+        while capacity < min_capacity:
+            capacity *= 2
+        extra = capacity - len(self.visits)
+        for field, default in (
+            (self.visits, 0),
+            (self.wins, 0),
+            (self.parent, -1),
+            (self.first_child, -1),
+            (self.num_children, 0),
+            (self.unvisited_head, -1),
+            (self.move, None),
+            (self.player_id, 0),
+            (self.hash, 0),
+            (self.amaf_visits, 0),
+            (self.amaf_wins, 0),
+        ):
+            field.extend([default] * extra)
+
+    def add_children(self, node: int, moves: List[Tuple[int, int]], player_id: int):
+        start, k = self.n_nodes, len(moves)
+        end = start + k
+        if end > len(self.visits):
+            self._grow(end)
+        self.n_nodes = end
+        self.first_child[node] = start
+        self.num_children[node] = k
+        self.unvisited_head[node] = start
+        # The slots may hold nodes of a previous search: overwrite every field
+        zeros, minus_ones = [0] * k, [-1] * k
+        self.visits[start:end] = zeros
+        self.wins[start:end] = zeros
+        self.parent[start:end] = [node] * k
+        self.first_child[start:end] = minus_ones
+        self.num_children[start:end] = zeros
+        self.unvisited_head[start:end] = minus_ones
+        self.move[start:end] = moves
+        self.player_id[start:end] = [player_id] * k
+        self.hash[start:end] = zeros
+        self.amaf_visits[start:end] = zeros
+        self.amaf_wins[start:end] = zeros
+
+    def extract_subtree(self, node: int) -> "MCTSTree":
+        """Returns a new tree holding a copy of the subtree under node, rooted at it"""
+        tree = MCTSTree(self.player_id[node])
+        tree.visits[0] = self.visits[node]
+        tree.wins[0] = self.wins[node]
+        tree.hash[0] = self.hash[node]
+        # Breadth-first copy: pairs grows while it is walked
+        pairs = [(node, 0)]
+        for old, new in pairs:
+            k = self.num_children[old]
+            if not k:
+                continue
+            start = self.first_child[old]
+            end = start + k
+            tree.add_children(new, self.move[start:end], self.player_id[start])
+            first = tree.first_child[new]
+            tree.visits[first : first + k] = self.visits[start:end]
+            tree.wins[first : first + k] = self.wins[start:end]
+            tree.hash[first : first + k] = self.hash[start:end]
+            tree.amaf_visits[first : first + k] = self.amaf_visits[start:end]
+            tree.amaf_wins[first : first + k] = self.amaf_wins[start:end]
+            tree.unvisited_head[new] = first + self.unvisited_head[old] - start
+            pairs.extend(zip(range(start, end), range(first, first + k)))
+        return tree
+
+    def children(self, node: int) -> range:
+        start = self.first_child[node]
+        return range(start, start + self.num_children[node])
+
+    def apply_move(self, node: int, board) -> None:
+        """Places on board the move that leads from the parent of node to node"""
+        move = self.move[node]
+        board.place_piece(move[0], move[1], self.player_id[self.parent[node]])
+
+    def next_unvisited(self, node: int) -> int:
+        """
+        Returns the first unvisited child in storage order, or -1 if every child
+        has been visited. The cursor only moves forward, so it is O(1) amortized.
+        """
+        child = self.unvisited_head[node]
+        end = self.first_child[node] + self.num_children[node]
+        visits = self.visits
+        while child < end and visits[child]:
+            child += 1
+        self.unvisited_head[node] = child
+        return child if child < end else -1
+
+    def unvisited_children(self, node: int) -> List[int]:
+        """Unvisited children in storage order, scanning only from the cursor"""
+        child = self.next_unvisited(node)
+        if child < 0:
+            return []
+        end = self.first_child[node] + self.num_children[node]
+        visits = self.visits
+        return [c for c in range(child, end) if not visits[c]]
+
+    def best_child(self, node: int, exploration_constant: float = 1.41) -> int:
+        """Returns the child with the highest UCT value (all children must be visited)"""
+        start = self.first_child[node]
+        end = start + self.num_children[node]
+        # The exploration numerator c * sqrt(log N) is shared by every child
+        explore = exploration_constant * math.sqrt(math.log(self.visits[node]))
+        child_visits = self.visits[start:end]
+        # Children never have more visits than their parent, so the tables of
+        # inverses cover them all and each child costs two multiplies and an add
+        tables = _inverse_tables(self.visits[node])
+        if tables is None:
+            inv_visits = [1.0 / visits for visits in child_visits]
+            inv_sqrt = [1.0 / math.sqrt(visits) for visits in child_visits]
+        else:
+            inv_visits = map(tables[0].__getitem__, child_visits)
+            inv_sqrt = map(tables[1].__getitem__, child_visits)
+        uct = [
+            wins * inv + explore * isq
+            for wins, inv, isq in zip(self.wins[start:end], inv_visits, inv_sqrt)
+        ]
+        return start + uct.index(max(uct))
+
+    def update_amaf(
+        self, path: List[int], stones_p1: int, size: int, won: float
+    ) -> None:
+        """
+        Adds one AMAF visit (and `won`) to every child of a node on path whose
+        cell ended up with the player moving from that node; stones_p1 is
+        player 1's bitboard at the end of the playout (player 2 has the rest).
+        """
+        # One character per cell, '1' for player 1 and '0' for player 2: the
+        # bitboard is unpacked once instead of shifted once per child and node
+        owner = format(stones_p1, f"0{size * size}b")[::-1]
+        first_child, num_children = self.first_child, self.num_children
+        move, amaf_visits, amaf_wins = self.move, self.amaf_visits, self.amaf_wins
+        for node in path:
+            start = first_child[node]
+            mine = "1" if self.player_id[node] == 1 else "0"
+            for child in range(start, start + num_children[node]):
+                row, col = move[child]
+                if owner[row * size + col] == mine:
+                    amaf_visits[child] += 1
+                    amaf_wins[child] += won
+
+    def best_child_amaf(
+        self, node: int, rave_constant: float, exploration_constant: float = 1.41
+    ) -> int:
+        """
+        Like best_child, but each child's win rate is mixed with its AMAF rate,
+        with weight beta = sqrt(k / (3 * visits + k)) for k = rave_constant
+        """
+        start = self.first_child[node]
+        end = start + self.num_children[node]
+        explore = exploration_constant * math.sqrt(math.log(self.visits[node]))
+        sqrt = math.sqrt
+        uct = []
+        for visits, wins, a_visits, a_wins in zip(
+            self.visits[start:end],
+            self.wins[start:end],
+            self.amaf_visits[start:end],
+            self.amaf_wins[start:end],
+        ):
+            value = wins / visits
+            if a_visits:
+                beta = sqrt(rave_constant / (3 * visits + rave_constant))
+                value += beta * (a_wins / a_visits - value)
+            uct.append(value + explore / sqrt(visits))
+        return start + uct.index(max(uct))
+
+
+def forced_move(board, player_id: int) -> Optional[Tuple[int, int]]:
+    """
+    The move to play without searching: the only legal one, or one that connects
+    player_id's edges on the spot. None if there is no such move.
+    """
+    moves = board.get_possible_moves()
+    if len(moves) == 1:
+        return moves[0]
+    # On a clone, so the caller's board is never touched
+    sim_board = board.clone()
+    for move in moves:
+        sim_board.place_piece(move[0], move[1], player_id)
+        won = sim_board.check_connection(player_id)
+        sim_board.undo()
+        if won:
+            return move
+    return None
+
+
+def _pool_starmap(num_workers: int, worker, args_list: list) -> list:
+    """Runs worker over args_list in a process pool (fork start method if available)"""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("fork" if "fork" in methods else None)
+    with context.Pool(num_workers) as pool:
+        return pool.starmap(worker, args_list)
+
+
+def _evaluate_moves_worker(player, board, moves, deadline: float, seed: int) -> list:
+    """Runs the flat Monte Carlo simulations of a subset of moves in a worker process"""
+    random.seed(seed)
+    return player._evaluate_moves(board, moves, deadline)
+
+
+def _search_worker(player, board, deadline: float, seed: int) -> dict:
+    """Runs one independent search tree in a worker process (root parallelization)"""
+    random.seed(seed)
+    return player._search(board, deadline)
 
 
 class MCSPlayer(Player):
-    def __init__(self, player_id, num_simulations=100, time_limit=2.0):
+    """
+    Flat Monte Carlo: random games from the position after each move. A move
+    that wins on the spot, or the only legal one, is played without searching
+    (see forced_move).
+    """
+
+    def __init__(self, player_id, num_simulations=100, time_limit=2.0, num_workers=1):
         super().__init__(player_id)
         self.num_simulations = num_simulations  # Number of random games to simulate
         self.time_limit = time_limit  # Time limit in seconds
+        # Number of processes sharing the root moves (1 searches in-process; more
+        # fork a pool on every move, so it is opt-in)
+        self.num_workers = num_workers
 
     def play(self, board):
-        start_time = time.time()
+        move = forced_move(board, self.player_id)
+        if move is not None:
+            return move
+        deadline = time.monotonic() + self.time_limit
         possible_moves = board.get_possible_moves()
-        best_move = None
-        best_wins = -1
 
-        # Try each possible move
-        for move in possible_moves:
-            wins = 0
-            sims_for_move = 0
-
-            # Run simulations for this move until time limit
-            while (
-                time.time() - start_time < self.time_limit
-                and sims_for_move < self.num_simulations
-            ):
-                # Create a copy of the board and make the move
-                sim_board = board.clone()
-                sim_board.place_piece(move[0], move[1], self.player_id)
-
-                # Simulate a random game from this position
-                if self._simulate_game(sim_board):
-                    wins += 1
-                sims_for_move += 1
+        # The simulations of each move are independent: split the moves among
+        # the workers (leaf parallelization) and gather (move, wins, sims).
+        workers = min(self.num_workers, len(possible_moves))
+        if workers <= 1:
+            results = self._evaluate_moves(board, possible_moves, deadline)
+        else:
+            base_seed = random.getrandbits(32)
+            chunks = _pool_starmap(
+                workers,
+                _evaluate_moves_worker,
+                [
+                    (self, board, possible_moves[i::workers], deadline, base_seed + i)
+                    for i in range(workers)
+                ],
+            )
+            results = [result for chunk in chunks for result in chunk]
 
+        best_move = None
+        best_wins = -1
+        for move, wins, sims_for_move in results:
             # Update best move if this one has more wins
             win_rate = wins / sims_for_move if sims_for_move > 0 else 0
             if win_rate > best_wins:
@@ -67,212 +371,386 @@ class MCSPlayer(Player):
 
         return best_move if best_move else random.choice(possible_moves)
 
-    def _simulate_game(self, board):
-        """Simulates a random game from the current position and returns True if we win"""
-        sim_board = board.clone()
-        current_player = 3 - self.player_id  # Start with opponent's turn
-
-        # Play until someone wins
-        while True:
-            # Get possible moves
-            moves = sim_board.get_possible_moves()
-            if not moves:
-                return False  # Draw (shouldn't happen in Hex)
-
-            # Make a random move
-            move = random.choice(moves)
-            sim_board.place_piece(move[0], move[1], current_player)
-
-            # Check for winner
-            if sim_board.check_connection(current_player):
-                return current_player == self.player_id
-
-            # Switch players
-            current_player = 3 - current_player
+    def _evaluate_moves(self, board, moves, deadline: float) -> list:
+        """
+        Runs num_simulations * len(moves) games in total, stopping early at
+        deadline (time.monotonic). Each game's root move is sampled uniformly, so
+        the moves get similar shares of the games (not exactly num_simulations
+        each), even when the deadline cuts the batch short.
+        """
+        n = len(moves)
+        wins = [0] * n
+        sims = [0] * n
+        bits = random.getrandbits
+
+        # Snapshot the position as bitboards once: the position after each move
+        # only adds that move's bit, so the games never touch the board object
+        size = board.size
+        starts = []
+        for row, col in moves:
+            bit = 1 << (row * size + col)
+            if self.player_id == 1:
+                starts.append((board.bitboard_p1 | bit, board.bitboard_p2))
+            else:
+                starts.append((board.bitboard_p1, board.bitboard_p2 | bit))
+
+        for i in range(self.num_simulations * n):
+            # Reading the clock is not free: check it once every 64 games
+            if not i & 63 and time.monotonic() >= deadline:
+                break
+            k = bits(32) % n
+            # Simulate a random game from the position after this move
+            if self._simulate_game(*starts[k], size):
+                wins[k] += 1
+            sims[k] += 1
+
+        return [(move, wins[k], sims[k]) for k, move in enumerate(moves)]
+
+    def _simulate_game(self, bits_p1: int, bits_p2: int, size: int) -> bool:
+        """Simulates a random game from the given bitboards and returns True if we win"""
+        # Start with opponent's turn
+        winner = random_playout(bits_p1, bits_p2, size, 3 - self.player_id)
+        return winner == self.player_id
 
 
 class MCS_UCT_Player(Player):
-    def __init__(self, player_id, simulation_time=2.0):
+    """
+    Monte Carlo tree search with UCT selection. A move that wins on the spot, or
+    the only legal one, is played without searching (see forced_move); the
+    subclasses keep that check.
+    """
+
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
         super().__init__(player_id)
         self.simulation_time = simulation_time
+        # Number of independent trees searched in parallel. With 1 the search runs
+        # in-process and reuses the previous move's subtree; more fork a pool on
+        # every move, so it is opt-in
+        self.num_workers = num_workers
+        # Visits a transposition needs before its win rate replaces a simulation
+        self.tt_min_visits = 8
+        # Playouts run from each selected leaf; their results are backpropagated
+        # together, so selection and expansion are paid once per batch
+        self.leaf_playouts = 1
+        # Leaves selected per round before any is simulated. Each pending leaf
+        # holds a virtual loss (virtual_loss visits with no wins) on its path, so
+        # the next descents spread over other branches; 1 disables batching
+        self.tree_batch = 1
+        self.virtual_loss = 1
+        # RAVE: weight k of the AMAF statistics in selection (0 disables them).
+        # They are gathered from the random fill playout, so the players with
+        # guided simulations leave it at 0
+        self.rave_constant = 0
+        # Tree storage reused by every search of this player (see _new_tree)
+        self._tree = None
+
+    def __getstate__(self):
+        # Workers get a copy of the player: leave the tree storage behind
+        state = self.__dict__.copy()
+        state["_tree"] = None
+        return state
+
+    def _reused_tree(self, board) -> MCTSTree:
+        """
+        Returns the previous search's subtree for the position on board (our move
+        and the opponent's reply, found by Zobrist hash) or an empty tree
+        """
+        old = self._tree
+        if old is not None:
+            target = board.zobrist_hash
+            for child in old.children(0):
+                for grandchild in old.children(child):
+                    if old.hash[grandchild] == target:
+                        self._tree = old.extract_subtree(grandchild)
+                        return self._tree
+        tree = self._new_tree()
+        tree.hash[0] = board.zobrist_hash
+        return tree
+
+    def _new_tree(self) -> MCTSTree:
+        """Returns an empty tree rooted at self.player_id, reusing the last one's storage"""
+        if self._tree is None:
+            self._tree = MCTSTree(self.player_id)
+        else:
+            self._tree.reset(self.player_id)
+        return self._tree
 
     def play(self, board):
-        root = Node(move=None, parent=None, player_id=self.player_id)
-        end_time = time.time() + self.simulation_time
-
-        # Main MCTS loop
-        while time.time() < end_time:
-            # 1. Selection
-            node = self._select(root, board.clone())
-            sim_board = board.clone()
-            # Reconstruct the board state for this node
-            self._reconstruct_board(node, sim_board)
-
-            # 2. Expansion
-            if node.visits > 0 and not sim_board.check_connection(3 - node.player_id):
-                moves = sim_board.get_possible_moves()
-                if moves:
-                    node.add_children(moves, 3 - node.player_id)
-                    node = random.choice(node.children)
-                    sim_board.place_piece(
-                        node.move[0], node.move[1], node.parent.player_id
-                    )
-
-            # 3. Simulation
-            result = self._simulate_game(sim_board, node.player_id)
-
-            # 4. Backpropagation
-            self._backpropagate(node, result)
+        move = forced_move(board, self.player_id)
+        if move is not None:
+            return move
+        # Fixed before the pool starts, so the worker startup counts against the time
+        deadline = time.monotonic() + self.simulation_time
+        if self.num_workers == 1:
+            stats = self._search(board, deadline)
+        else:
+            # Root parallelization: every worker grows its own tree with a different
+            # seed and only the root children statistics are merged.
+            base_seed = random.getrandbits(32)
+            results = _pool_starmap(
+                self.num_workers,
+                _search_worker,
+                [
+                    (self, board, deadline, base_seed + i)
+                    for i in range(self.num_workers)
+                ],
+            )
+            visits = Counter()
+            wins = Counter()
+            for result in results:
+                for move, (move_visits, move_wins) in result.items():
+                    visits[move] += move_visits
+                    wins[move] += move_wins
+            stats = {move: (visits[move], wins[move]) for move in visits}
+
+        if not stats:
+            return random.choice(board.get_possible_moves())
 
         # Choose the best move
-        best_child = max(root.children, key=lambda c: c.visits)
-        return best_child.move
-
-    def _select(self, node: Node, board) -> Node:
-        while node.children is not None and node.children:
-            if not all(child.visits > 0 for child in node.children):
-                # Select first unvisited child
-                unvisited = [c for c in node.children if c.visits == 0]
-                return random.choice(unvisited)
-            # Select child with highest UCT value
-            node = max(node.children, key=lambda c: c.uct_value())
-        return node
-
-    def _reconstruct_board(self, node: Node, board) -> None:
-        moves = []
-        current = node
-        while current.parent is not None:
-            moves.append((current.move, current.parent.player_id))
-            current = current.parent
-        for move, player in reversed(moves):
-            board.place_piece(move[0], move[1], player)
+        return max(stats, key=lambda m: stats[m][0])
 
-    def _simulate_game(self, board, player_id: int) -> bool:
+    def _search(self, board, deadline: float) -> dict:
+        """
+        Runs the MCTS loop until deadline (time.monotonic) and returns
+        {move: (visits, wins)} for the root children
+        """
+        tree = self._reused_tree(board)
+        keys, side_key = zobrist_keys(board.size)
+        # One board for the whole search: each iteration undoes its own moves
         sim_board = board.clone()
-        current_player = player_id
+        root_depth = len(sim_board.move_history)
+        # Transposition table: Zobrist hash -> first node that reached the position
+        transpositions = {}
 
-        while True:
-            moves = sim_board.get_possible_moves()
-            if not moves:
-                return False
-
-            move = random.choice(moves)
-            sim_board.place_piece(move[0], move[1], current_player)
-
-            if sim_board.check_connection(current_player):
-                return current_player == self.player_id
+        # Main MCTS loop
+        while time.monotonic() < deadline:
+            # 1-2. Selection and expansion of tree_batch leaves. Every leaf but the
+            # last is put on hold with a virtual loss and the board goes back to
+            # the root; the last one is simulated straight away
+            pending = []
+            for _ in range(self.tree_batch - 1):
+                path = self._descend(tree, sim_board, keys, side_key)
+                self._backpropagate(tree, path, 0, self.virtual_loss)
+                pending.append(path)
+                sim_board.undo(len(sim_board.move_history) - root_depth)
+            path = self._descend(tree, sim_board, keys, side_key)
+
+            # 3-4. Simulation and backpropagation
+            batch = self.leaf_playouts
+            result = self._evaluate_leaf(tree, path, sim_board, transpositions)
+            self._backpropagate(tree, path, result, batch)
+            sim_board.undo(len(sim_board.move_history) - root_depth)
+
+            # Pending leaves: replay the path, then swap the virtual loss for
+            # the real result
+            for path in pending:
+                for node in path[1:]:
+                    tree.apply_move(node, sim_board)
+                result = self._evaluate_leaf(tree, path, sim_board, transpositions)
+                self._backpropagate(tree, path, result, batch - self.virtual_loss)
+                sim_board.undo(len(sim_board.move_history) - root_depth)
+
+        return {
+            tree.move[child]: (tree.visits[child], tree.wins[child])
+            for child in tree.children(0)
+        }
+
+    def _descend(self, tree: MCTSTree, sim_board, keys, side_key) -> List[int]:
+        """
+        Selects a leaf from the root and expands it if it was already visited,
+        leaving sim_board at the returned path's last node
+        """
+        path = [0]  # Nodes visited this iteration, root first
+        node, sim_board = self._select(tree, path, sim_board)
+
+        # Player ids are 1 and 2, so id ^ 3 is the opponent
+        next_player = tree.player_id[node] ^ 3
+        if tree.visits[node] > 0 and not sim_board.winner:
+            moves = list(sim_board._empty_cells())
+            if moves:
+                random.shuffle(moves)
+                tree.add_children(node, moves, next_player)
+                # Children hashes follow from the parent's, as on the board
+                start = tree.first_child[node]
+                parent_hash = tree.hash[node] ^ side_key
+                mover_keys = keys[next_player ^ 3]
+                size = sim_board.size
+                tree.hash[start : start + len(moves)] = [
+                    parent_hash ^ mover_keys[row * size + col] for row, col in moves
+                ]
+                node = start
+                path.append(node)
+                move = tree.move[node]
+                sim_board.place_piece(move[0], move[1], next_player ^ 3)
+        return path
+
+    def _evaluate_leaf(
+        self, tree: MCTSTree, path: List[int], sim_board, transpositions
+    ):
+        """
+        Wins out of leaf_playouts simulations from path[-1] (sim_board's position),
+        or their estimate from the win rate of the same position reached by
+        another move order with enough visits
+        """
+        node = path[-1]
+        batch = self.leaf_playouts
+        twin = transpositions.setdefault(sim_board.zobrist_hash, node)
+        if twin != node and tree.visits[twin] >= self.tt_min_visits:
+            return batch * tree.wins[twin] / tree.visits[twin]
+        player_id = tree.player_id[node]
+        if self.rave_constant:
+            return self._simulate_amaf(tree, path, sim_board, player_id, batch)
+        leaf_depth = len(sim_board.move_history)
+        result = 0
+        for _ in range(batch):
+            result += self._simulate_game(sim_board, player_id)
+            # Guided simulations play on the board: start each from the leaf
+            sim_board.undo(len(sim_board.move_history) - leaf_depth)
+        return result
+
+    def _select(self, tree: MCTSTree, path: List[int], board) -> Tuple[int, object]:
+        """
+        Descends from path[-1] to a leaf, applying each selected move to board
+        (modified in place) and appending each selected node to path, and
+        returns the leaf with its board state.
+        """
+        node = path[-1]
+        while tree.num_children[node]:
+            # Children are shuffled on expansion, so the next unvisited one is random
+            child = tree.next_unvisited(node)
+            if child >= 0:
+                tree.apply_move(child, board)
+                path.append(child)
+                return child, board
+            # Select child with highest UCT value, mixed with AMAF under RAVE
+            if self.rave_constant:
+                node = tree.best_child_amaf(node, self.rave_constant)
+            else:
+                node = tree.best_child(node)
+            tree.apply_move(node, board)
+            path.append(node)
+        return node, board
 
-            current_player = 3 - current_player
+    def _simulate_game(self, board, player_id: int) -> bool:
+        winner = random_playout(
+            board.bitboard_p1, board.bitboard_p2, board.size, player_id
+        )
+        return winner == self.player_id
 
-    def _backpropagate(self, node: Node, won: bool) -> None:
-        while node is not None:
-            node.visits += 1
-            if won:
-                node.wins += 1
-            node = node.parent
+    def _simulate_amaf(
+        self, tree: MCTSTree, path: List[int], board, player_id: int, batch: int
+    ) -> int:
+        """
+        Runs batch random fill playouts from board, adding each one's AMAF
+        statistics along path, and returns how many we won
+        """
+        size = board.size
+        result = 0
+        for _ in range(batch):
+            stones_p1 = random_fill(
+                board.bitboard_p1, board.bitboard_p2, size, player_id
+            )
+            winner = 1 if bitboard_connected(stones_p1, size, 1) else 2
+            won = winner == self.player_id
+            tree.update_amaf(path, stones_p1, size, won)
+            result += won
+        return result
+
+    def _backpropagate(
+        self, tree: MCTSTree, path: List[int], won: float, n_visits: int = 1
+    ) -> None:
+        """
+        Adds n_visits visits and `won` along path: the wins of those playouts,
+        or their estimate from a transposition's win rate
+        """
+        visits, wins = tree.visits, tree.wins
+        for node in path:
+            visits[node] += n_visits
+            wins[node] += won
 
 
 class MCT_A_star_Sim_Player(MCS_UCT_Player):
-    def __init__(self, player_id, simulation_time=2.0):
-        super().__init__(player_id, simulation_time)
-
-    def _heuristic(self, pos, goal_cells, board):
-        """Manhattan distance heuristic adjusted for hex board"""
-        min_dist = float("inf")
-        row, col = pos
-        for goal_row, goal_col in goal_cells:
-            # Adjusted distance calculation for hex grid
-            dist = abs(row - goal_row) + abs(col - goal_col)
-            min_dist = min(min_dist, dist)
-        return min_dist
-
-    def _get_neighbors(self, pos, board):
-        """Get valid neighboring cells"""
-        row, col = pos
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]
-        neighbors = []
-
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if (
-                0 <= new_row < board.size
-                and 0 <= new_col < board.size
-                and board.board[new_row][new_col] == 0
-            ):
-                neighbors.append((new_row, new_col))
-        return neighbors
-
-    def _get_goal_cells(self, player_id, board):
-        """Get the goal cells based on player_id"""
-        if player_id == 1:  # Vertical connection (top to bottom)
-            return [(board.size - 1, col) for col in range(board.size)]
-        else:  # Horizontal connection (left to right)
-            return [(row, board.size - 1) for row in range(board.size)]
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
+        super().__init__(player_id, simulation_time, num_workers)
 
     def _get_start_cells(self, player_id, board):
-        """Get the starting cells based on player_id"""
-        if player_id == 1:  # Vertical connection (top to bottom)
-            return [(0, col) for col in range(board.size)]
-        else:  # Horizontal connection (left to right)
-            return [(row, 0) for row in range(board.size)]
+        """Get the starting cells based on player_id (cached tuple)"""
+        return edge_cells(board.size, player_id)[0]
 
     def _a_star_simulation(self, board, player_id):
         """Simulate game using A* pathfinding"""
-        from heapq import heappush, heappop
+        # Bound to locals: the heap and random calls run once per A* step or ply
+        push, pop, bits = heappush, heappop, random.getrandbits
 
-        sim_board = board.clone()
+        # Plays on the caller's board, which undoes the moves after backpropagation
+        sim_board = board
         current_player = player_id
+        size = board.size
+        cells = size * size
+        inf = float("inf")
+
+        # Cells are encoded as row * size + col: the scores are dense lists indexed
+        # by cell, and the heuristic is the cached distance of every cell to the
+        # goal edge, so a cell is a goal exactly when its heuristic is 0.
+        # Heap entries pack (f, cell) into one int, f << shift | cell, so the heap
+        # compares plain ints in the same order as the tuples
+        shift = cells.bit_length()
+        mask = (1 << shift) - 1
+        neighbors = neighbor_table(size)
 
         while True:
-            # Get start and goal positions for current player
+            # Get start cells and goal distances for current player
             start_cells = self._get_start_cells(current_player, sim_board)
-            goal_cells = self._get_goal_cells(current_player, sim_board)
+            h_score = goal_distances(size, current_player)
 
             # Initialize A* algorithm
             open_set = []
-            closed_set = set()
-            g_score = {}
-            f_score = {}
+            closed = bytearray(cells)
+            g_score = [inf] * cells
+
+            # Occupied cells for this ply: the neighbor scan below inlines
+            # _get_neighbors over the per-size neighbor table
+            occupied = sim_board.bitboard_p1 | sim_board.bitboard_p2
 
             # Add all start cells to open set
-            for start in start_cells:
-                if sim_board.board[start[0]][start[1]] == 0:
-                    heappush(
-                        open_set, (self._heuristic(start, goal_cells, sim_board), start)
-                    )
+            for row, col in start_cells:
+                if sim_board.board[row][col] == 0:
+                    start = row * size + col
+                    push(open_set, h_score[start] << shift | start)
                     g_score[start] = 0
-                    f_score[start] = self._heuristic(start, goal_cells, sim_board)
 
             # A* search
             selected_move = None
-            while open_set and not selected_move:
-                current = heappop(open_set)[1]
+            while open_set:
+                current = pop(open_set) & mask
 
-                if current in goal_cells:
-                    selected_move = current
+                if not h_score[current]:
+                    selected_move = divmod(current, size)
                     break
 
-                closed_set.add(current)
+                if closed[current]:
+                    continue
+                closed[current] = 1
 
-                for neighbor in self._get_neighbors(current, sim_board):
-                    if neighbor in closed_set:
+                for neighbor in neighbors[current]:
+                    if closed[neighbor] or occupied >> neighbor & 1:
                         continue
 
                     tentative_g = g_score[current] + 1
 
-                    if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                    if tentative_g < g_score[neighbor]:
                         g_score[neighbor] = tentative_g
-                        f_score[neighbor] = tentative_g + self._heuristic(
-                            neighbor, goal_cells, sim_board
+                        push(
+                            open_set,
+                            (tentative_g + h_score[neighbor]) << shift | neighbor,
                         )
-                        heappush(open_set, (f_score[neighbor], neighbor))
 
             # If no path found, make a random move
             if not selected_move:
-                moves = sim_board.get_possible_moves()
+                moves = sim_board._empty_cells()
                 if not moves:
                     return False
-                selected_move = random.choice(moves)
+                selected_move = moves[bits(32) % len(moves)]
 
             # Make the move
             sim_board.place_piece(selected_move[0], selected_move[1], current_player)
@@ -282,237 +760,229 @@ class MCT_A_star_Sim_Player(MCS_UCT_Player):
                 return current_player == self.player_id
 
             # Switch players
-            current_player = 3 - current_player
+            current_player ^= 3
 
     def _simulate_game(self, board, player_id: int) -> bool:
         """Override the random simulation with A* guided simulation"""
         return self._a_star_simulation(board, player_id)
 
 
-class MCT_A_star_Exp_Player(MCS_UCT_Player):
-    def __init__(self, player_id, simulation_time=2.0):
-        super().__init__(player_id, simulation_time)
-
-    def _heuristic(self, pos, goal_cells, board):
-        """Manhattan distance heuristic adjusted for hex board"""
-        min_dist = float("inf")
-        row, col = pos
-        for goal_row, goal_col in goal_cells:
-            dist = abs(row - goal_row) + abs(col - goal_col)
-            min_dist = min(min_dist, dist)
-        return min_dist
-
-    def _get_neighbors(self, pos, board):
-        """Get valid neighboring cells"""
-        row, col = pos
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]
-        neighbors = []
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if (
-                0 <= new_row < board.size
-                and 0 <= new_col < board.size
-                and board.board[new_row][new_col] == 0
-            ):
-                neighbors.append((new_row, new_col))
-        return neighbors
-
-    def _get_goal_cells(self, player_id, board):
-        """Get goal cells based on player_id"""
-        if player_id == 1:  # Vertical connection
-            return [(board.size - 1, col) for col in range(board.size)]
-        else:  # Horizontal connection
-            return [(row, board.size - 1) for row in range(board.size)]
-
-    def _get_start_cells(self, player_id, board):
-        """Get starting cells based on player_id"""
-        if player_id == 1:  # Vertical connection
-            return [(0, col) for col in range(board.size)]
-        else:  # Horizontal connection
-            return [(row, 0) for row in range(board.size)]
-
-    def _evaluate_move_a_star(self, move, board, player_id):
-        """Evaluate a move using A* pathfinding"""
-        from heapq import heappush, heappop
-
-        # Make the move on a temporary board
-        sim_board = board.clone()
-        sim_board.place_piece(move[0], move[1], player_id)
+class MCT_PathCutoff_Player(MCT_A_star_Sim_Player):
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
+        super().__init__(player_id, simulation_time, num_workers)
 
-        start_cells = self._get_start_cells(player_id, sim_board)
-        goal_cells = self._get_goal_cells(player_id, sim_board)
-
-        # Initialize A* algorithm
+    def _path_length(self, board, player_id):
+        """
+        Cost of the cheapest connection for player_id: own cells cost 0, empty
+        cells 1 and opponent cells block. Since own cells are free the Manhattan
+        heuristic is not admissible, so the search runs with h = 0 (Dijkstra).
+        """
+        push, pop = heappush, heappop
+
+        size = board.size
+        cells = size * size
+        grid = [value for row in board.board for value in row]
+        neighbors = neighbor_table(size)
+        opponent = 3 - player_id
+        inf = float("inf")
+        # Heap entries pack (cost, cell) into one int, cost << shift | cell
+        shift = cells.bit_length()
+        mask = (1 << shift) - 1
+
+        cost = [inf] * cells
         open_set = []
-        closed_set = set()
-        g_score = {}
+        for row, col in self._get_start_cells(player_id, board):
+            start = row * size + col
+            value = grid[start]
+            if value != opponent:
+                start_cost = 0 if value == player_id else 1
+                if start_cost < cost[start]:
+                    cost[start] = start_cost
+                    push(open_set, start_cost << shift | start)
+
+        goal = size - 1
+        while open_set:
+            entry = pop(open_set)
+            current, current_cost = entry & mask, entry >> shift
+            if current_cost > cost[current]:
+                continue
+            if (current // size if player_id == 1 else current % size) == goal:
+                return current_cost
+            for neighbor in neighbors[current]:
+                value = grid[neighbor]
+                if value == opponent:
+                    continue
+                new_cost = current_cost + (value != player_id)
+                if new_cost < cost[neighbor]:
+                    cost[neighbor] = new_cost
+                    push(open_set, new_cost << shift | neighbor)
+        return inf
+
+    def _rollout_astar_cutoff(self, board, player_id) -> bool:
+        """
+        Ends the rollout immediately: the player with the shorter remaining path
+        is declared the winner, and ties go to the side to move (player_id).
+        """
+        mine = self._path_length(board, self.player_id)
+        theirs = self._path_length(board, 3 - self.player_id)
+        if mine != theirs:
+            return mine < theirs
+        return player_id == self.player_id
 
-        # Add all start cells to open set
-        min_f_score = float("inf")
-        for start in start_cells:
-            if sim_board.board[start[0]][start[1]] in [0, player_id]:
-                h_score = self._heuristic(start, goal_cells, sim_board)
-                heappush(open_set, (h_score, start))
-                g_score[start] = 0
-                min_f_score = min(min_f_score, h_score)
+    def _simulate_game(self, board, player_id: int) -> bool:
+        """Replace the per-ply A* simulation with a single path comparison"""
+        return self._rollout_astar_cutoff(board, player_id)
 
-        # If no valid path exists, return a high score
-        if min_f_score == float("inf"):
-            return float("inf")
 
-        return min_f_score
+class MCT_A_star_Exp_Player(MCS_UCT_Player):
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
+        super().__init__(player_id, simulation_time, num_workers)
 
-    def _select(self, node: Node, board) -> Node:
+    def _select(self, tree: MCTSTree, path: List[int], board) -> Tuple[int, object]:
         """Modified selection using A* evaluation for unvisited nodes"""
-        while node.children is not None and node.children:
-            if not all(child.visits > 0 for child in node.children):
-                # Evaluate unvisited children using A*
-                unvisited = [c for c in node.children if c.visits == 0]
-                scores = [
-                    (self._evaluate_move_a_star(c.move, board, node.player_id), c)
-                    for c in unvisited
-                ]
-                return min(scores, key=lambda x: x[0])[1]
+        node = path[-1]
+        while tree.num_children[node]:
+            # A stone never closes its own start cells, so every unvisited child
+            # has the parent's A* score and the lowest is the first unvisited
+            # child in storage order, random since children are shuffled
+            child = tree.next_unvisited(node)
+            if child >= 0:
+                tree.apply_move(child, board)
+                path.append(child)
+                return child, board
             # Use standard UCT for visited nodes
-            node = max(node.children, key=lambda c: c.uct_value())
-        return node
+            node = tree.best_child(node)
+            tree.apply_move(node, board)
+            path.append(node)
+        return node, board
 
 
 class MCT_Full_A_Star_Player(MCS_UCT_Player):
-    def __init__(self, player_id, simulation_time=2.0):
-        super().__init__(player_id, simulation_time)
-
-    def _heuristic(self, pos, goal_cells):
-        """Manhattan distance heuristic adjusted for hex board"""
-        min_dist = float("inf")
-        row, col = pos
-        for goal_row, goal_col in goal_cells:
-            dist = abs(row - goal_row) + abs(col - goal_col)
-            min_dist = min(min_dist, dist)
-        return min_dist
-
-    def _get_neighbors(self, pos, board):
-        """Get valid neighboring cells"""
-        row, col = pos
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]
-        neighbors = []
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if (
-                0 <= new_row < board.size
-                and 0 <= new_col < board.size
-                and board.board[new_row][new_col] == 0
-            ):
-                neighbors.append((new_row, new_col))
-        return neighbors
+    """
+    MCTS with A*-guided expansion and playouts. Like MCS_UCT_Player, it plays a
+    winning or only legal move without searching.
+    """
+
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
+        super().__init__(player_id, simulation_time, num_workers)
 
     def _get_goal_cells(self, player_id, board):
-        """Get goal cells based on player_id"""
-        if player_id == 1:  # Vertical connection
-            return [(board.size - 1, col) for col in range(board.size)]
-        else:  # Horizontal connection
-            return [(row, board.size - 1) for row in range(board.size)]
+        """Get goal cells based on player_id (cached frozenset)"""
+        return edge_cells(board.size, player_id)[1]
 
     def _get_start_cells(self, player_id, board):
-        """Get starting cells based on player_id"""
-        if player_id == 1:  # Vertical connection
-            return [(0, col) for col in range(board.size)]
-        else:  # Horizontal connection
-            return [(row, 0) for row in range(board.size)]
-
-    def _evaluate_moves_with_a_star(self, board, player_id):
-        """Evaluate all possible moves using A* and return them sorted by score"""
-        from heapq import heappush, heappop
-
-        moves = board.get_possible_moves()
-        move_scores = []
+        """Get starting cells based on player_id (cached tuple)"""
+        return edge_cells(board.size, player_id)[0]
 
-        for move in moves:
-            # Create a temporary board with the move
-            sim_board = board.clone()
-            sim_board.place_piece(move[0], move[1], player_id)
-
-            # Initialize A* parameters
-            start_cells = self._get_start_cells(player_id, sim_board)
-            goal_cells = self._get_goal_cells(player_id, sim_board)
-
-            # Find the minimum path length using A*
-            min_path_length = float("inf")
-            for start in start_cells:
-                if sim_board.board[start[0]][start[1]] in [0, player_id]:
-                    open_set = [(self._heuristic(start, goal_cells), 0, start)]
-                    closed_set = set()
-                    g_scores = {start: 0}
-
-                    while open_set:
-                        f, g, current = heappop(open_set)
-
-                        if current in goal_cells:
-                            min_path_length = min(min_path_length, g)
-                            break
-
-                        if current in closed_set:
-                            continue
-
-                        closed_set.add(current)
-
-                        for neighbor in self._get_neighbors(current, sim_board):
-                            if neighbor in closed_set:
-                                continue
-
-                            tentative_g = g_scores[current] + 1
+    def _edge_distances(self, cells, player_id, board):
+        """
+        Number of empty cells on the cheapest chain from `cells` to every cell
+        (0-1 BFS: own stones cost 0, empty cells 1, opponent stones block)
+        """
+        size = board.size
+        grid = [value for row in board.board for value in row]
+        neighbors = neighbor_table(size)
+        opponent = player_id ^ 3
+        dist = [float("inf")] * (size * size)
+
+        queue = deque()
+        for row, col in cells:
+            idx = row * size + col
+            if grid[idx] != opponent:
+                dist[idx] = 0 if grid[idx] == player_id else 1
+                queue.append(idx)
+
+        while queue:
+            idx = queue.popleft()
+            d = dist[idx]
+            for neighbor in neighbors[idx]:
+                value = grid[neighbor]
+                if value == opponent:
+                    continue
+                if value == player_id:
+                    if d < dist[neighbor]:
+                        dist[neighbor] = d
+                        queue.appendleft(neighbor)
+                elif d + 1 < dist[neighbor]:
+                    dist[neighbor] = d + 1
+                    queue.append(neighbor)
+        return dist
 
-                            if (
-                                neighbor not in g_scores
-                                or tentative_g < g_scores[neighbor]
-                            ):
-                                g_scores[neighbor] = tentative_g
-                                f_score = tentative_g + self._heuristic(
-                                    neighbor, goal_cells
-                                )
-                                heappush(open_set, (f_score, tentative_g, neighbor))
+    def _evaluate_moves_with_a_star(self, board, player_id):
+        """
+        Sort the possible moves by the length of the shortest connection through
+        them: one distance pass from each edge scores every move at once.
+
+        The move that joins two of player_id's stones into a connection ranks
+        first (run with python -m doctest utils/MCSPlayer.py):
+
+        >>> from hexboard import MyBoard
+        >>> board = MyBoard(3)
+        >>> board.place_piece(0, 1, 1) and board.place_piece(2, 1, 1)
+        True
+        >>> MCT_Full_A_Star_Player(1)._evaluate_moves_with_a_star(board, 1)[0]
+        (1, 1)
+        """
+        size = board.size
+        start_cells = self._get_start_cells(player_id, board)
+        goal_cells = self._get_goal_cells(player_id, board)
+        from_start = self._edge_distances(start_cells, player_id, board)
+        from_goal = self._edge_distances(goal_cells, player_id, board)
 
-            move_scores.append((min_path_length, move))
+        def score(move):
+            idx = move[0] * size + move[1]
+            return from_start[idx] + from_goal[idx], move
 
-        return [move for _, move in sorted(move_scores)]
+        return sorted(board._empty_cells(), key=score)
 
     def play(self, board):
-        root = Node(move=None, parent=None, player_id=self.player_id)
-        end_time = time.time() + self.simulation_time
+        move = forced_move(board, self.player_id)
+        if move is not None:
+            return move
+        tree = self._new_tree()
+        end_time = time.monotonic() + self.simulation_time
+        # One board for the whole search: each iteration undoes its own moves
+        sim_board = board.clone()
+        root_depth = len(sim_board.move_history)
 
         # Main MCTS loop with A* guided expansion and simulation
-        while time.time() < end_time:
+        while time.monotonic() < end_time:
             # Selection
-            node = self._select(root, board.clone())
-            sim_board = board.clone()
-            self._reconstruct_board(node, sim_board)
+            path = [0]  # Nodes visited this iteration, root first
+            node, sim_board = self._select(tree, path, sim_board)
 
             # Expansion with A* guidance
-            if node.visits > 0 and not sim_board.check_connection(3 - node.player_id):
-                sorted_moves = self._evaluate_moves_with_a_star(
-                    sim_board, 3 - node.player_id
-                )
+            next_player = tree.player_id[node] ^ 3
+            if tree.visits[node] > 0 and not sim_board.winner:
+                sorted_moves = self._evaluate_moves_with_a_star(sim_board, next_player)
                 if sorted_moves:
-                    node.add_children(sorted_moves, 3 - node.player_id)
+                    # The best move according to A* comes first; the rest are
+                    # shuffled, so _select takes the other unvisited children at
+                    # random rather than in A* order
+                    rest = sorted_moves[1:]
+                    random.shuffle(rest)
+                    tree.add_children(node, sorted_moves[:1] + rest, next_player)
                     # Choose the best move according to A*
-                    node = node.children[0]
-                    sim_board.place_piece(
-                        node.move[0], node.move[1], node.parent.player_id
-                    )
+                    node = tree.first_child[node]
+                    path.append(node)
+                    move = tree.move[node]
+                    sim_board.place_piece(move[0], move[1], next_player ^ 3)
 
             # Simulation (using A* guided playouts)
-            result = self._a_star_simulation(sim_board, node.player_id)
+            result = self._a_star_simulation(sim_board, tree.player_id[node])
 
             # Backpropagation
-            self._backpropagate(node, result)
+            self._backpropagate(tree, path, result)
+            sim_board.undo(len(sim_board.move_history) - root_depth)
 
         # Choose the best move based on visit count
-        best_child = max(root.children, key=lambda c: c.visits)
-        return best_child.move
+        best_child = max(tree.children(0), key=lambda c: tree.visits[c])
+        return tree.move[best_child]
 
     def _a_star_simulation(self, board, player_id):
         """Simulate game using A* for move selection"""
-        sim_board = board.clone()
+        # Plays on the caller's board, which undoes the moves after backpropagation
+        sim_board = board
         current_player = player_id
 
         while True:
@@ -530,12 +1000,20 @@ class MCT_Full_A_Star_Player(MCS_UCT_Player):
                 return current_player == self.player_id
 
             # Switch players
-            current_player = 3 - current_player
+            current_player ^= 3
 
 
 class MCT_Heuristic_Player(MCS_UCT_Player):
-    def __init__(self, player_id, simulation_time=2.0):
-        super().__init__(player_id, simulation_time)
+    """
+    MCTS with heuristic-guided expansion and playouts. Like MCS_UCT_Player, it
+    plays a winning or only legal move without searching.
+    """
+
+    def __init__(self, player_id, simulation_time=2.0, num_workers=1):
+        super().__init__(player_id, simulation_time, num_workers)
+        # Last score field computed and the (size, hash, player) it belongs to
+        self._field_key = None
+        self._field = None
 
     def _evaluate_position(self, pos, board, player_id):
         """
@@ -544,98 +1022,122 @@ class MCT_Heuristic_Player(MCS_UCT_Player):
         2. Connectivity potential
         3. Center control
         """
-        row, col = pos
-        score = 0
-
-        # Distance to goals
-        if player_id == 1:  # Vertical connection (top-bottom)
-            score -= abs(row - (board.size - 1))  # Distance to bottom
-        else:  # Horizontal connection (left-right)
-            score -= abs(col - (board.size - 1))  # Distance to right edge
-
-        # Center control (positions closer to center are better)
-        center = board.size // 2
-        center_dist = abs(row - center) + abs(col - center)
-        score += (board.size - center_dist) / 2
-
-        # Connectivity potential (count empty neighbors)
-        directions = [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]
-        empty_neighbors = 0
-        friendly_neighbors = 0
+        return self._score_field(board, player_id)[pos[0] * board.size + pos[1]]
 
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if 0 <= new_row < board.size and 0 <= new_col < board.size:
-                if board.board[new_row][new_col] == 0:
-                    empty_neighbors += 1
-                elif board.board[new_row][new_col] == player_id:
-                    friendly_neighbors += 1
-
-        score += empty_neighbors * 0.5 + friendly_neighbors * 1.0
-        return score
+    def _score_field(self, board, player_id):
+        """
+        Heuristic score of every empty cell (row * size + col; -inf if occupied).
+        Distance and center terms come from a per-size table; the last field is
+        kept and reused while the board (Zobrist hash) and player are the same.
+        """
+        key = (board.size, board.zobrist_hash, player_id)
+        if key == self._field_key:
+            return self._field
+
+        size = board.size
+        grid = [value for row in board.board for value in row]
+        base = position_base_scores(size, player_id)
+        neighbors = neighbor_table(size)
+        field = [float("-inf")] * (size * size)
+
+        for row, col in board._empty_cells():
+            idx = row * size + col
+            score = base[idx]
+            # Connectivity potential: empty and friendly neighbors
+            for neighbor in neighbors[idx]:
+                value = grid[neighbor]
+                if value == 0:
+                    score += 0.5
+                elif value == player_id:
+                    score += 1.0
+            field[idx] = score
+
+        self._field_key, self._field = key, field
+        return field
 
     def _get_best_moves(self, board, player_id, num_moves=1):
         """Get the top N moves based on heuristic evaluation"""
-        possible_moves = board.get_possible_moves()
-        move_scores = []
-
-        for move in possible_moves:
-            score = self._evaluate_position(move, board, player_id)
-            move_scores.append((score, move))
-
-        # Sort moves by score and return top N
-        move_scores.sort(reverse=True)
-        return [move for _, move in move_scores[:num_moves]]
-
-    def _select(self, node: Node, board) -> Node:
+        size = board.size
+        field = self._score_field(board, player_id)
+        move_scores = [
+            (field[row * size + col], (row, col)) for row, col in board._empty_cells()
+        ]
+        # Same order as sorting by (score, move) descending, without the full sort
+        return [move for _, move in nlargest(num_moves, move_scores)]
+
+    def _select(self, tree: MCTSTree, path: List[int], board) -> Tuple[int, object]:
         """Modified selection using heuristic evaluation for unvisited nodes"""
-        while node.children is not None and node.children:
-            if not all(child.visits > 0 for child in node.children):
-                unvisited = [c for c in node.children if c.visits == 0]
+        node = path[-1]
+        while tree.num_children[node]:
+            unvisited = tree.unvisited_children(node)
+            if unvisited:
                 scores = [
-                    (self._evaluate_position(c.move, board, node.player_id), c)
+                    (
+                        self._evaluate_position(
+                            tree.move[c], board, tree.player_id[node]
+                        ),
+                        c,
+                    )
                     for c in unvisited
                 ]
-                return max(scores, key=lambda x: x[0])[1]
-            node = max(node.children, key=lambda c: c.uct_value())
-        return node
+                child = max(scores, key=lambda x: x[0])[1]
+                tree.apply_move(child, board)
+                path.append(child)
+                return child, board
+            node = tree.best_child(node)
+            tree.apply_move(node, board)
+            path.append(node)
+        return node, board
 
     def play(self, board):
-        root = Node(move=None, parent=None, player_id=self.player_id)
-        end_time = time.time() + self.simulation_time
+        move = forced_move(board, self.player_id)
+        if move is not None:
+            return move
+        tree = self._new_tree()
+        end_time = time.monotonic() + self.simulation_time
+        # One board for the whole search: each iteration undoes its own moves
+        sim_board = board.clone()
+        root_depth = len(sim_board.move_history)
 
-        while time.time() < end_time:
+        while time.monotonic() < end_time:
             # Selection
-            node = self._select(root, board.clone())
-            sim_board = board.clone()
-            self._reconstruct_board(node, sim_board)
+            path = [0]  # Nodes visited this iteration, root first
+            node, sim_board = self._select(tree, path, sim_board)
 
             # Expansion with heuristic guidance
-            if node.visits > 0 and not sim_board.check_connection(3 - node.player_id):
-                best_moves = self._get_best_moves(sim_board, 3 - node.player_id)
+            next_player = tree.player_id[node] ^ 3
+            if tree.visits[node] > 0 and not sim_board.winner:
+                best_moves = self._get_best_moves(sim_board, next_player)
                 if best_moves:
-                    node.add_children(best_moves, 3 - node.player_id)
-                    node = random.choice(node.children)
-                    sim_board.place_piece(
-                        node.move[0], node.move[1], node.parent.player_id
-                    )
+                    tree.add_children(node, best_moves, next_player)
+                    children = tree.children(node)
+                    node = children[random.getrandbits(32) % len(children)]
+                    path.append(node)
+                    move = tree.move[node]
+                    sim_board.place_piece(move[0], move[1], next_player ^ 3)
 
             # Simulation with heuristic guidance
-            result = self._heuristic_simulation(sim_board, node.player_id)
+            result = self._heuristic_simulation(sim_board, tree.player_id[node])
 
             # Backpropagation
-            self._backpropagate(node, result)
+            self._backpropagate(tree, path, result)
+            sim_board.undo(len(sim_board.move_history) - root_depth)
 
         # Choose best child based on visits and wins
+        root_visits = tree.visits[0]
         best_child = max(
-            root.children, key=lambda c: (c.wins / c.visits) + (c.visits / root.visits)
+            tree.children(0),
+            key=lambda c: (tree.wins[c] / tree.visits[c])
+            + (tree.visits[c] / root_visits),
         )
-        return best_child.move
+        return tree.move[best_child]
 
     def _heuristic_simulation(self, board, player_id: int) -> bool:
         """Simulate game using heuristic-guided moves instead of random"""
-        sim_board = board.clone()
+        # Plays on the caller's board, which undoes the moves after backpropagation
+        sim_board = board
         current_player = player_id
+        bits = random.getrandbits
 
         while True:
             # Get top moves based on heuristic
@@ -644,10 +1146,10 @@ class MCT_Heuristic_Player(MCS_UCT_Player):
                 return False
 
             # Choose one of the top moves (with some randomness)
-            move = random.choice(best_moves)
+            move = best_moves[bits(32) % len(best_moves)]
             sim_board.place_piece(move[0], move[1], current_player)
 
             if sim_board.check_connection(current_player):
                 return current_player == self.player_id
 
-            current_player = 3 - current_player
+            current_player ^= 3
@@ -1,5 +1,43 @@
+from functools import lru_cache
 from basic_classes import Player, HexBoard
-import copy
+from hexboard import neighbor_table
+from playouts import bitboard_adjacencies
+
+# Kinds of transposition table entries: the stored value is the exact minimax
+# value, or only a lower / upper bound on it
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+@lru_cache(maxsize=None)
+def line_masks(size, player_id):
+    """Bitboard masks of the lines a player runs along: columns for 1, rows for 2"""
+    if player_id == 1:
+        column = sum(1 << (r * size) for r in range(size))
+        return tuple(column << c for c in range(size))
+    row = (1 << size) - 1
+    return tuple(row << (r * size) for r in range(size))
+
+
+@lru_cache(maxsize=None)
+def center_rings(size):
+    """Bitboard masks of the cells at each Manhattan distance from the center"""
+    half = size // 2
+    rings = [0] * (2 * half + 1)
+    for row in range(size):
+        for col in range(size):
+            rings[abs(row - half) + abs(col - half)] |= 1 << (row * size + col)
+    return tuple(rings)
+
+
+@lru_cache(maxsize=None)
+def center_map(size):
+    """Center control of each cell, indexed by row * size + col: 1 - distance / size"""
+    half = size // 2
+    return tuple(
+        1 - (abs(row - half) + abs(col - half)) / size
+        for row in range(size)
+        for col in range(size)
+    )
 
 
 class MinMaxPlayer(Player):
@@ -9,6 +47,9 @@ class MinMaxPlayer(Player):
         self.opponent_id = (
             3 - player_id
         )  # If player_id is 1, opponent is 2 and vice versa
+        # Values of positions already searched during the current play(), keyed by
+        # (Zobrist hash, remaining depth): (value, EXACT / LOWER / UPPER bound)
+        self.transpositions = {}
 
     def play(self, board):
         """Selects the best move using MinMax with alpha-beta pruning"""
@@ -17,19 +58,20 @@ class MinMaxPlayer(Player):
         alpha = float("-inf")
         beta = float("inf")
 
-        # Try each possible move
-        for move in board.get_possible_moves():
-            # Create a copy of the board and make the move
+        # Entries from an earlier turn would never be reached again
+        self.transpositions.clear()
 
-            # print(f"\n {type(board)} \n")
+        # One board for the whole search: every move is placed and then undone
+        sim_board = board.clone()
 
-            new_board = board.clone()
-            new_board.place_piece(move[0], move[1], self.player_id)
-
-            # print(f"\n {type(new_board)} \n")
+        # Try each possible move, most promising first (a copy: placing and undoing
+        # reorders the board's list)
+        for move in self._ordered_moves(sim_board, self.player_id):
+            sim_board.place_piece(move[0], move[1], self.player_id)
 
             # Get score for this move
-            score = self.min_value(new_board, self.depth - 1, alpha, beta)
+            score = self.min_value(sim_board, self.depth - 1, alpha, beta)
+            sim_board.unplace_piece(move[0], move[1], self.player_id)
 
             # Update best move if necessary
             if score > best_score:
@@ -42,89 +84,137 @@ class MinMaxPlayer(Player):
 
     def min_value(self, board, depth, alpha, beta):
         """Minimizing player's turn (opponent)"""
-        # Check terminal conditions
-        if board.check_connection(self.player_id):
-            return 1000  # Win for max player
-        if board.check_connection(self.opponent_id):
-            return -1000  # Win for min player
+        # Check terminal conditions (the board records the winner when it connects)
+        if board.winner:
+            return 1000 if board.winner == self.player_id else -1000
         if depth == 0:
             return self.evaluate_board(board)
 
+        # Reuse the value if this position was reached before by another move order
+        key = (board.zobrist_hash, depth)
+        cached = self._probe(key, alpha, beta)
+        if cached is not None:
+            return cached
+        window = (alpha, beta)
+
         value = float("inf")
 
-        # Try each possible move
-        for move in board.get_possible_moves():
-            # Create a copy and make the move
-            new_board = board.clone()
-            new_board.place_piece(move[0], move[1], self.opponent_id)
+        # Try each possible move, most promising first
+        for move in self._ordered_moves(board, self.opponent_id):
+            # Make the move, then take it back once its value is known
+            board.place_piece(move[0], move[1], self.opponent_id)
 
             # Recursively get the value
-            value = min(value, self.max_value(new_board, depth - 1, alpha, beta))
+            value = min(value, self.max_value(board, depth - 1, alpha, beta))
+            board.unplace_piece(move[0], move[1], self.opponent_id)
 
             # Alpha-beta pruning
             if value <= alpha:
-                return value
+                break
             beta = min(beta, value)
 
+        self._store(key, value, *window)
         return value
 
     def max_value(self, board, depth, alpha, beta):
         """Maximizing player's turn (self)"""
-        # Check terminal conditions
-        if board.check_connection(self.player_id):
-            return 1000  # Win for max player
-        if board.check_connection(self.opponent_id):
-            return -1000  # Win for min player
+        # Check terminal conditions (the board records the winner when it connects)
+        if board.winner:
+            return 1000 if board.winner == self.player_id else -1000
         if depth == 0:
             return self.evaluate_board(board)
 
+        # Reuse the value if this position was reached before by another move order
+        key = (board.zobrist_hash, depth)
+        cached = self._probe(key, alpha, beta)
+        if cached is not None:
+            return cached
+        window = (alpha, beta)
+
         value = float("-inf")
 
-        # Try each possible move
-        for move in board.get_possible_moves():
-            # Create a copy and make the move
-            new_board = board.clone()
-            new_board.place_piece(move[0], move[1], self.player_id)
+        # Try each possible move, most promising first
+        for move in self._ordered_moves(board, self.player_id):
+            # Make the move, then take it back once its value is known
+            board.place_piece(move[0], move[1], self.player_id)
 
             # Recursively get the value
-            value = max(value, self.min_value(new_board, depth - 1, alpha, beta))
+            value = max(value, self.min_value(board, depth - 1, alpha, beta))
+            board.unplace_piece(move[0], move[1], self.player_id)
 
             # Alpha-beta pruning
             if value >= beta:
-                return value
+                break
             alpha = max(alpha, value)
 
+        self._store(key, value, *window)
         return value
 
+    def _ordered_moves(self, board, player):
+        """
+        Returns the possible moves sorted so that alpha-beta finds cutoffs early:
+        cells next to more of the mover's pieces first, then closer to the center
+        """
+        size = board.size
+        stones = board.bitboards[player]
+        neighbors = neighbor_table(size)
+        center = center_map(size)
+
+        def promise(move):
+            idx = move[0] * size + move[1]
+            allies = 0
+            for neighbor in neighbors[idx]:
+                allies += stones >> neighbor & 1
+            return allies + center[idx]
+
+        return sorted(board.get_possible_moves(), key=promise, reverse=True)
+
+    def _probe(self, key, alpha, beta):
+        """Returns the stored value of a position if it settles the window, else None"""
+        entry = self.transpositions.get(key)
+        if entry is None:
+            return None
+        value, bound = entry
+        if (
+            bound == EXACT
+            or (bound == LOWER and value >= beta)
+            or (bound == UPPER and value <= alpha)
+        ):
+            return value
+        return None
+
+    def _store(self, key, value, alpha, beta):
+        """Stores a searched value with the kind of bound the (alpha, beta) window gives"""
+        # A cutoff only proves a bound: the true value can be lower when the search
+        # failed low, or higher when it failed high
+        if value <= alpha:
+            bound = UPPER
+        elif value >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (value, bound)
+
     def evaluate_board(self, board):
         """Evaluates the current board state"""
-        score = 0
         size = board.size
+        center = 0  # Center control, in units of 1 / size
+        connections = 0
+
+        for player, sign in ((self.player_id, 1), (self.opponent_id, -1)):
+            stones = board.bitboards[player]
+
+            # Add points for controlling center positions: a stone at distance d from
+            # the center is worth 1 - d / size, so count the stones on each ring of
+            # equal distance instead of visiting them one by one
+            for distance, ring in enumerate(center_rings(size)):
+                center += sign * (size - distance) * (stones & ring).bit_count()
+
+            # Add points for pieces forming connections: every adjacent pair of
+            # stones, counted from both ends, in a few shifts of the bitboard
+            connections += sign * bitboard_adjacencies(stones, size)
 
-        # Evaluate based on position control
-        for row in range(size):
-            for col in range(size):
-                if board.board[row][col] == self.player_id:
-                    # Add points for controlling center positions
-                    center_control = (
-                        1 - (abs(row - size // 2) + abs(col - size // 2)) / size
-                    )
-                    score += center_control
-
-                    # Add points for pieces forming connections
-                    connected_allies = self.count_connected_allies(board, row, col)
-                    score += connected_allies
-
-                elif board.board[row][col] == self.opponent_id:
-                    # Subtract points for opponent's pieces
-                    center_control = (
-                        1 - (abs(row - size // 2) + abs(col - size // 2)) / size
-                    )
-                    score -= center_control
-
-                    # Subtract points for opponent's connections
-                    connected_allies = self.count_connected_allies(board, row, col)
-                    score -= connected_allies
+        score = center / size + connections
 
         # Add bonus for controlling key paths
         if self.player_id == 1:  # North-South player
@@ -136,51 +226,35 @@ class MinMaxPlayer(Player):
 
     def count_connected_allies(self, board, row, col):
         """Counts the number of allied pieces adjacent to the given position"""
+        size = board.size
+        stones = board.bitboards[board.board[row][col]]
+
+        # Neighbors are precomputed once per board size: no bounds checks here, and
+        # each one is a single bit test on the owner's bitboard
         count = 0
-        directions = [(0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1)]
-        player = board.board[row][col]
-
-        for dr, dc in directions:
-            new_row, new_col = row + dr, col + dc
-            if (
-                0 <= new_row < board.size
-                and 0 <= new_col < board.size
-                and board.board[new_row][new_col] == player
-            ):
-                count += 1
+        for neighbor in neighbor_table(size)[row * size + col]:
+            count += stones >> neighbor & 1
 
         return count
 
     def evaluate_vertical_paths(self, board):
         """Evaluates potential paths from north to south"""
-        score = 0
-        size = board.size
-
-        # Check each column
-        for col in range(size):
-            consecutive = 0
-            for row in range(size):
-                if board.board[row][col] == self.player_id:
-                    consecutive += 1
-                elif board.board[row][col] == self.opponent_id:
-                    consecutive = 0
-            score += consecutive * 2
-
-        return score * 3
+        return self._evaluate_paths(board, line_masks(board.size, 1))
 
     def evaluate_horizontal_paths(self, board):
         """Evaluates potential paths from east to west"""
+        return self._evaluate_paths(board, line_masks(board.size, 2))
+
+    def _evaluate_paths(self, board, lines):
+        """Scores the run of own pieces after the last opponent piece on each line"""
         score = 0
-        size = board.size
+        mine = board.bitboards[self.player_id]
+        theirs = board.bitboards[self.opponent_id]
 
-        # Check each row
-        for row in range(size):
-            consecutive = 0
-            for col in range(size):
-                if board.board[row][col] == self.player_id:
-                    consecutive += 1
-                elif board.board[row][col] == self.opponent_id:
-                    consecutive = 0
+        # Bits grow along each line, so the run is every own piece above the
+        # highest opponent bit: one shift and one popcount per line
+        for line in lines:
+            consecutive = ((mine & line) >> (theirs & line).bit_length()).bit_count()
             score += consecutive * 2
 
         return score * 3
@@ -1,121 +1,126 @@
-from heapq import heappop, heappush
+from collections import deque
 from basic_classes import Player, HexBoard
+from hexboard import NEIGHBOR_OFFSETS
 
 
 class UCSPlayer(Player):
     def __init__(self, player_id):
         super().__init__(player_id)
 
-    def _pos_to_node(self, pos: tuple) -> str:
-        """Convert position tuple to node string"""
-        return f"pos_{pos[0]}_{pos[1]}"
-
-    def _node_to_pos(self, node: str) -> tuple:
-        """Convert node string back to position tuple"""
-        if node in ["start", "end"]:
+    def _node_to_pos(self, node: int, size: int) -> tuple:
+        """Convert node index back to position tuple"""
+        if node >= size * size:  # 'start' and 'end' sentinels
             return None
-        _, row, col = node.split("_")
-        return (int(row), int(col))
+        return divmod(node, size)
+
+    def _sentinels(self, size: int) -> tuple:
+        """Indices of the 'start' and 'end' nodes, right after the board cells"""
+        return size * size, size * size + 1
 
     def play(self, board: HexBoard) -> tuple:
         """
         Decide the next move using Uniform Cost Search (UCS).
         """
         graph = self._initialize_graph(board)
-        path = self._ucs(graph, "start", "end")
+        path = self._ucs(graph, *self._sentinels(board.size))
 
         # Find first empty position in path
         for node in path:
-            pos = self._node_to_pos(node)
+            pos = self._node_to_pos(node, board.size)
             if pos is not None and board.board[pos[0]][pos[1]] == 0:
                 return pos
 
         return board.get_possible_moves()[0]
 
-    def _initialize_graph(self, board: HexBoard) -> dict:
+    def _initialize_graph(self, board: HexBoard) -> list:
         """
-        Initializes the graph representation of the Hex board.
+        Initializes the graph representation of the Hex board: an adjacency list
+        indexed by node, holding (neighbor, cost) pairs.
         """
         size = board.size
-        graph = {"start": {}, "end": {}}
+        grid = board.board
+        start, end = self._sentinels(size)
+        graph = [[] for _ in range(size * size + 2)]
+        opponent = 3 - self.player_id
 
         # Add edges from 'start' to first row/column
         if self.player_id == 1:  # Red player (top to bottom)
-            for col in range(size):
-                node = self._pos_to_node((0, col))
-                if board.board[0][col] == 0:  # Casilla vacía
-                    graph["start"][node] = 1
-                elif board.board[0][col] == self.player_id:  # Nuestra ficha
-                    graph["start"][node] = 0
+            first = [(0, col) for col in range(size)]
+            last = [(size - 1, col) for col in range(size)]
         else:  # Blue player (left to right)
-            for row in range(size):
-                node = self._pos_to_node((row, 0))
-                if board.board[row][0] == 0:  # Casilla vacía
-                    graph["start"][node] = 1
-                elif board.board[row][0] == self.player_id:  # Nuestra ficha
-                    graph["start"][node] = 0
+            first = [(row, 0) for row in range(size)]
+            last = [(row, size - 1) for row in range(size)]
+        for row, col in first:
+            if grid[row][col] == 0:  # Casilla vacía
+                graph[start].append((row * size + col, 1))
+            elif grid[row][col] == self.player_id:  # Nuestra ficha
+                graph[start].append((row * size + col, 0))
 
         # Add edges to 'end' from last row/column
-        if self.player_id == 1:
-            for col in range(size):
-                node = self._pos_to_node((size - 1, col))
-                if board.board[size - 1][col] == self.player_id:  # Nuestra ficha
-                    graph[node] = {"end": 0}
-                elif board.board[size - 1][col] == 0:  # Casilla vacía
-                    graph[node] = {"end": 1}
-        else:
-            for row in range(size):
-                node = self._pos_to_node((row, size - 1))
-                if board.board[row][size - 1] == self.player_id:  # Nuestra ficha
-                    graph[node] = {"end": 0}
-                elif board.board[row][size - 1] == 0:  # Casilla vacía
-                    graph[node] = {"end": 1}
+        for row, col in last:
+            if grid[row][col] == self.player_id:  # Nuestra ficha
+                graph[row * size + col].append((end, 0))
+            elif grid[row][col] == 0:  # Casilla vacía
+                graph[row * size + col].append((end, 1))
 
         # Add edges between board positions
         for row in range(size):
             for col in range(size):
-                curr_node = self._pos_to_node((row, col))
-                if curr_node not in graph:
-                    graph[curr_node] = {}
-
                 # Solo procesar si la casilla está vacía o es nuestra
-                if (
-                    board.board[row][col] != 3 - self.player_id
-                ):  # No procesar casillas del oponente
-                    for dr, dc in [(-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1)]:
-                        nr, nc = row + dr, col + dc
-                        if 0 <= nr < size and 0 <= nc < size:
-                            next_node = self._pos_to_node((nr, nc))
-                            curr_state = board.board[nr][nc]
-
-                            # Diferentes costos según el estado de la casilla
-                            if curr_state == 0:  # Casilla vacía
-                                graph[curr_node][next_node] = 1
-                            elif curr_state == self.player_id:  # Nuestra ficha
-                                graph[curr_node][next_node] = 0
+                if grid[row][col] == opponent:  # No procesar casillas del oponente
+                    continue
+                edges = graph[row * size + col]
+                for dr, dc in NEIGHBOR_OFFSETS:
+                    nr, nc = row + dr, col + dc
+                    if 0 <= nr < size and 0 <= nc < size:
+                        # Diferentes costos según el estado de la casilla
+                        if grid[nr][nc] == 0:  # Casilla vacía
+                            edges.append((nr * size + nc, 1))
+                        elif grid[nr][nc] == self.player_id:  # Nuestra ficha
+                            edges.append((nr * size + nc, 0))
 
         return graph
 
-    def _ucs(self, graph: dict, start: str, end: str) -> list:
+    def _ucs(self, graph: list, start: int, end: int) -> list:
         """
         Finds the shortest path from start to end using Uniform Cost Search (UCS).
+        Each node keeps a pointer to its parent; only the final path is rebuilt.
+
+        Edge costs are only 0 or 1, so the frontier is a deque instead of a heap
+        (0-1 BFS): a node reached through a free edge goes to the front, one that
+        costs a step to the back, and nodes still leave in cost order with O(1)
+        pushes and pops.
         """
-        frontier = [(0, start, [start])]  # (cost, current_node, path)
-        visited = set()
+        n = len(graph)
+        frontier = deque([start])
+        came_from = [-1] * n
+        best_cost = [float("inf")] * n
+        best_cost[start] = 0
+        visited = bytearray(n)
 
         while frontier:
-            cost, current, path = heappop(frontier)
+            current = frontier.popleft()
 
-            if current in visited:
+            if visited[current]:
                 continue
-            visited.add(current)
+            visited[current] = 1
 
             if current == end:
-                return path
-
-            for neighbor, step_cost in graph[current].items():
-                if neighbor not in visited:
-                    new_path = path + [neighbor]
-                    heappush(frontier, (cost + step_cost, neighbor, new_path))
+                path = [current]
+                while current != start:
+                    current = came_from[current]
+                    path.append(current)
+                return path[::-1]
+
+            cost = best_cost[current]
+            for neighbor, step_cost in graph[current]:
+                new_cost = cost + step_cost
+                if not visited[neighbor] and new_cost < best_cost[neighbor]:
+                    best_cost[neighbor] = new_cost
+                    came_from[neighbor] = current
+                    if step_cost:
+                        frontier.append(neighbor)
+                    else:
+                        frontier.appendleft(neighbor)
 
         return []
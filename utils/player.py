@@ -1,11 +1,62 @@
-from copy import deepcopy
+from collections import deque
+from functools import lru_cache
+import logging
 import random
 from basic_classes import Player
+from playouts import bitboard_masks
+
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=None)
+def _box_table(size):
+    """For each cell row * size + col, the cells within one row and one column of it"""
+    return tuple(
+        tuple(
+            r * size + c
+            for r in range(max(row - 1, 0), min(row + 2, size))
+            for c in range(max(col - 1, 0), min(col + 2, size))
+        )
+        for row in range(size)
+        for col in range(size)
+    )
+
+
+@lru_cache(maxsize=8)
+def _heuristic_grid(size, player_id):
+    """AsPlayer's heuristic of every cell, by index row * size + col"""
+    if player_id == 1:  # Red player (top to bottom)
+        # Distance to bottom
+        return tuple(size - row for row in range(size) for col in range(size))
+    # Blue player (left to right): distance to right
+    return tuple(size - col for row in range(size) for col in range(size))
+
+
+@lru_cache(maxsize=8)
+def _center_penalty(size):
+    """ManhattanPlayer's center penalty, in tenths, of each row/column index"""
+    center = size // 2
+    return tuple(3 * abs(idx - center) for idx in range(size))
+
+
+@lru_cache(maxsize=8)
+def _goal_lines(size, player_id):
+    """
+    Bitboards of player_id's lines parallel to its goal side, nearest to the goal
+    first: the rows from the bottom for Red, the columns from the right for Blue
+    """
+    if player_id == 1:  # Red player (top to bottom)
+        row = (1 << size) - 1
+        return tuple(row << (r * size) for r in reversed(range(size)))
+    # Blue player (left to right)
+    col = sum(1 << (r * size) for r in range(size))
+    return tuple(col << c for c in reversed(range(size)))
 
 
 class BadPlayer(Player):
     def __init__(self, player_id):
         super().__init__(player_id)
+        self._opponent_id = 3 - player_id
 
     def play(self, board) -> tuple:
         """
@@ -15,47 +66,47 @@ class BadPlayer(Player):
         :return: Tuple (row, col) of selected move.
         """
         possible_moves = board.get_possible_moves()
-        my_positions = board.player_positions[self.player_id]
+        size = board.size
+        own = board.bitboards[self.player_id]
 
         # If no pieces placed yet, start near the starting edge
-        if not my_positions:
+        if not own:
             if self.player_id == 1:  # Red player (top to bottom)
-                return (0, board.size // 2)  # Start at top middle
+                return (0, size // 2)  # Start at top middle
             else:  # Blue player (left to right)
-                return (board.size // 2, 0)  # Start at left middle
-
-        best_move = None
-        best_score = float("inf")
-
-        for move in possible_moves:
-            row, col = move
-            # Check if move is adjacent to any of our pieces
-            is_adjacent = any(
-                abs(row - pos[0]) <= 1 and abs(col - pos[1]) <= 1
-                for pos in my_positions
-            )
-
-            if is_adjacent:
-                if self.player_id == 1:  # Red player
-                    # Score based on distance to bottom
-                    score = board.size - row
-                else:  # Blue player
-                    # Score based on distance to right side
-                    score = board.size - col
-
-                if score < best_score:
-                    best_score = score
-                    best_move = move
-                elif score == best_score and random.random() < 0.5:
-                    best_move = move
+                return (size // 2, 0)  # Start at left middle
+
+        # Cells within one row and one column of any of our pieces: our bitboard
+        # grown one column each way, then one row each way
+        full, not_first_col, not_last_col, _ = bitboard_masks(size)
+        near = own | ((own << 1) & not_first_col) | ((own >> 1) & not_last_col)
+        near |= (near << size) | (near >> size)
+        # Check which moves are adjacent to any of our pieces, all at once
+        adjacent = near & full & ~(own | board.bitboards[self._opponent_id])
+
+        # Score based on distance to the goal side (bottom for Red, right for
+        # Blue): the best moves are the adjacent ones on the line nearest to it,
+        # and ties are broken with a single random choice
+        for line in _goal_lines(size, self.player_id):
+            best = adjacent & line
+            if best:
+                best_moves = []
+                while best:
+                    bit = best & -best
+                    best_moves.append(divmod(bit.bit_length() - 1, size))
+                    best ^= bit
+                return random.choice(best_moves)
 
         # If no adjacent moves found, choose randomly
-        return best_move if best_move is not None else random.choice(possible_moves)
+        return random.choice(possible_moves)
 
 
 class ManhattanPlayer(Player):
     def __init__(self, player_id):
         super().__init__(player_id)
+        # Coordinate that measures progress towards the goal side: the row for
+        # Red (top to bottom), the column for Blue (left to right)
+        self._axis = 0 if player_id == 1 else 1
 
     def play(self, board) -> tuple:
         """
@@ -67,46 +118,37 @@ class ManhattanPlayer(Player):
         :return: Tuple (row, col) of the selected move
         """
         possible_moves = board.get_possible_moves()
-        best_move = None
-        best_score = float("inf")  # We want to minimize distance
 
         board_size = board.size
-
-        for move in possible_moves:
-            row, col = move
-            current_score = float("inf")
-
-            # Player 1 (Red) - Connects top to bottom
-            if self.player_id == 1:
-                # Manhattan distance from current position to bottom row
-                distance_to_bottom = board_size - 1 - row
-                # Add penalty for moves far from center column
-                center_penalty = abs(col - board_size // 2)
-                current_score = distance_to_bottom + 0.3 * center_penalty
-
-            # Player 2 (Blue) - Connects left to right
-            else:
-                # Manhattan distance from current position to right edge
-                distance_to_right = board_size - 1 - col
-                # Add penalty for moves far from center row
-                center_penalty = abs(row - board_size // 2)
-                current_score = distance_to_right + 0.3 * center_penalty
-
-            # Update best move if current score is better
-            if current_score < best_score:
-                best_score = current_score
-                best_move = move
-
-            # # Break ties randomly
-            elif current_score == best_score and random.random() < 0.5:
-                best_move = move
-
-        return best_move
+        penalty = _center_penalty(board_size)
+
+        # Scores for every move in one pass, in tenths so they stay integers:
+        # 10 * distance to the goal side + 3 * distance from the center line
+        # (the same order as distance + 0.3 * penalty, without float rounding).
+        # Red (top to bottom) measures the distance on the row and the penalty on
+        # the column, Blue (left to right) the other way around
+        axis, cross = self._axis, 1 - self._axis
+        scores = [
+            10 * (board_size - 1 - move[axis]) + penalty[move[cross]]
+            for move in possible_moves
+        ]
+
+        # We want to minimize distance: break ties among the best moves with a
+        # single random choice
+        best_score = min(scores, default=None)
+        best_moves = [
+            move
+            for move, current_score in zip(possible_moves, scores)
+            if current_score == best_score
+        ]
+
+        return random.choice(best_moves) if best_moves else None
 
 
 class AsPlayer(Player):
     def __init__(self, player_id):
         super().__init__(player_id)
+        self._opponent_id = 3 - player_id
 
     def play(self, board) -> tuple:
         """
@@ -118,44 +160,33 @@ class AsPlayer(Player):
         if not possible_moves:
             return None
 
-        def heuristic(pos):
-            row, col = pos
-            if self.player_id == 1:  # Red player (top to bottom)
-                return board.size - row  # Distance to bottom
-            else:  # Blue player (left to right)
-                return board.size - col  # Distance to right
-
-        def get_neighbors(pos):
-            row, col = pos
-            directions = [(0, 1), (1, 0), (-1, 0), (0, -1), (1, -1), (-1, 1)]
-            neighbors = []
-            for dr, dc in directions:
-                new_row, new_col = row + dr, col + dc
-                if (new_row, new_col) in possible_moves:
-                    neighbors.append((new_row, new_col))
-            return neighbors
+        size = board.size
+        # Shared by every AsPlayer with the same id on boards of this size
+        heuristic = _heuristic_grid(size, self.player_id)
+        # Current path length: the same for every move
+        g_score = len(board.player_positions[self.player_id])
+
+        # Number of opponent pieces within one row and one column of each cell,
+        # counted once per call instead of scanning the opponent's pieces per move
+        boxes = _box_table(size)
+        opponent_near = [0] * (size * size)
+        for opp_row, opp_col in board.player_positions[self._opponent_id]:
+            for cell in boxes[opp_row * size + opp_col]:
+                opponent_near[cell] += 1
 
         best_move = None
         best_score = float("inf")
 
         # Evaluate each possible move
         for move in possible_moves:
+            idx = move[0] * size + move[1]
             # Calculate f_score = g_score + h_score
-            g_score = len(board.player_positions[self.player_id])  # Current path length
-            h_score = heuristic(move)
+            h_score = heuristic[idx]
             f_score = g_score + h_score
 
-            # Check if this move blocks opponent
-            opponent_id = 3 - self.player_id
-            opponent_positions = board.player_positions[opponent_id]
-            if opponent_positions:
-                # Bonus for blocking opponent's path
-                for opp_pos in opponent_positions:
-                    if (
-                        abs(move[0] - opp_pos[0]) <= 1
-                        and abs(move[1] - opp_pos[1]) <= 1
-                    ):
-                        f_score -= 2
+            # Check if this move blocks opponent: bonus for each opponent piece
+            # around it
+            f_score -= 2 * opponent_near[idx]
 
             if f_score < best_score:
                 best_score = f_score
@@ -166,8 +197,116 @@ class AsPlayer(Player):
         return best_move if best_move else random.choice(possible_moves)
 
 
-import heapq
-import time
+# Neighbor offsets of UCSPlayer's layout, which depend on the row's parity
+_HEX_DIRS_EVEN = (
+    (-1, 0),  # Up
+    (1, 0),  # Down
+    (0, -1),  # Left
+    (0, 1),  # Right
+    (-1, 1),  # Up-Right
+    (1, 1),  # Down-Right
+)
+_HEX_DIRS_ODD = (
+    (-1, 0),  # Up
+    (1, 0),  # Down
+    (0, -1),  # Left
+    (0, 1),  # Right
+    (-1, -1),  # Up-Left
+    (1, -1),  # Down-Left
+)
+
+
+@lru_cache(maxsize=None)
+def _ucs_neighbor_table(size):
+    """
+    For each cell row * size + col, the indices of its neighbors on the board in
+    UCSPlayer's layout (the parity offsets above, clipped to the board)
+    """
+    return tuple(
+        tuple(
+            (row + dr) * size + col + dc
+            for dr, dc in (_HEX_DIRS_ODD if row & 1 else _HEX_DIRS_EVEN)
+            if 0 <= row + dr < size and 0 <= col + dc < size
+        )
+        for row in range(size)
+        for col in range(size)
+    )
+
+
+@lru_cache(maxsize=None)
+def _ucs_goal_cells(size, player_id):
+    """Flags of the cells on player_id's last row/column, by index row * size + col"""
+    if player_id == 1:  # Red player (top to bottom)
+        return bytes(int(idx >= size * (size - 1)) for idx in range(size * size))
+    # Blue player (left to right)
+    return bytes(int(idx % size == size - 1) for idx in range(size * size))
+
+
+def _ucs_kernel(cells, size, player_id) -> int:
+    """
+    Cheapest connection between player_id's two sides over the flat cell list.
+    Nodes are cell indices (row * size + col); neighbors come from a per-size table
+    instead of building a graph. Entering an empty cell costs 1, an own cell 0, and
+    the opponent's cells are never entered. The cells of the first row/column are
+    the sources, at no cost, and the search stops as soon as a cell of the last
+    row/column leaves the frontier: its cost is already the cheapest connection.
+
+    Edge costs are only 0 or 1, so the frontier is a deque (0-1 BFS) rather than a
+    heap: a node reached through a free edge goes to the front, one that costs a
+    step to the back. Nodes still leave in cost order, with O(1) pushes and pops.
+
+    Kept as a plain function of primitive arguments, with every name it uses in
+    the loop bound to a local, so the interpreter does no attribute lookups there.
+    """
+    opponent = 3 - player_id
+    neighbor_table = _ucs_neighbor_table(size)
+    goal_cells = _ucs_goal_cells(size, player_id)
+    if player_id == 1:  # Red player (top to bottom)
+        first_edge = range(size)
+    else:  # Blue player (left to right)
+        first_edge = range(0, size * size, size)
+
+    # Keep track of visited nodes and costs
+    visited = bytearray(size * size)
+    cost_so_far = [float("inf")] * (size * size)
+
+    # Nodes in cost order: free edges push to the front, paid ones to the back.
+    # The sources are the first row/column's cells that are not the opponent's
+    sources = [node for node in first_edge if cells[node] != opponent]
+    for node in sources:
+        cost_so_far[node] = 0
+    frontier = deque(sources)
+    push_front, push_back, pop = frontier.appendleft, frontier.append, frontier.popleft
+
+    while frontier:
+        current_node = pop()
+
+        if visited[current_node]:
+            continue
+
+        visited[current_node] = 1
+        current_cost = cost_so_far[current_node]
+
+        # Reached the last row/column
+        if goal_cells[current_node]:
+            return current_cost
+
+        # Explore neighbors
+        for next_node in neighbor_table[current_node]:
+            state = cells[next_node]
+            if state == opponent or visited[next_node]:
+                # Opponent's cell is ignored
+                continue
+            if state == 0:  # Empty cell
+                new_cost = current_cost + 1
+                if new_cost < cost_so_far[next_node]:
+                    cost_so_far[next_node] = new_cost
+                    push_back(next_node)
+            elif current_cost < cost_so_far[next_node]:  # Own cell
+                cost_so_far[next_node] = current_cost
+                push_front(next_node)
+
+    return float("inf")  # No path found
 
 
 class UCSPlayer(Player):
@@ -178,121 +317,30 @@ class UCSPlayer(Player):
         best_move = None
         min_cost = float("inf")
 
-        for move in board.get_possible_moves():
-            # Clonamos el tablero para simular el movimiento
-            new_board = board.clone()
-            new_board.place_piece(*move, self.player_id)
+        # Estado de cada casilla, por índice fila * size + columna. La búsqueda solo
+        # lee esta lista: cada movimiento se simula escribiendo la casilla y
+        # restaurándola, sin copiar el tablero ni pasar por place_piece
+        size = board.size
+        cells = [value for row in board.board for value in row]
+        for row, col in board.get_possible_moves():
+            idx = row * size + col
+            cells[idx] = self.player_id
 
             # Calculamos el costo mínimo para conectar los bordes
-            cost = self._ucs_path_cost(new_board)
+            cost = self._ucs_path_cost(cells, size)
+            cells[idx] = 0
 
             if cost < min_cost:
                 min_cost = cost
-                best_move = move
-
-        print(min_cost)
-        print(best_move)
+                best_move = (row, col)
 
-        time.sleep(1)
+        logger.debug("ucs min_cost=%s best=%s", min_cost, best_move)
 
         return best_move
 
-    def inicialize_graph(self, board):
-        size = board.size
-        graph = {}
-        start_node = "start"
-        end_node = "end"
-
-        # Initialize graph with start and end nodes
-        graph[start_node] = {}
-        graph[end_node] = {}
-
-        # Add edges from start node to initial positions
-        if self.player_id == 1:  # Red player (top to bottom)
-            for col in range(size):
-                graph[start_node][(0, col)] = 0
-        else:  # Blue player (left to right)
-            for row in range(size):
-                graph[start_node][(row, 0)] = 0
-
-        # Add edges from final positions to end node
-        if self.player_id == 1:  # Red player (top to bottom)
-            for col in range(size):
-                graph[(size - 1, col)] = {end_node: 0}
-        else:  # Blue player (left to right)
-            for row in range(size):
-                graph[(row, size - 1)] = {end_node: 0}
-
-        # Add edges for all board positions
-        for row in range(size):
-            for col in range(size):
-                if board.board[row][col] != 3 - self.player_id:  # Ignore opponent cells
-                    graph[(row, col)] = {}
-                    if row % 2 == 0:  # Even rows
-                        directions = [
-                            (-1, 0),  # Up
-                            (1, 0),  # Down
-                            (0, -1),  # Left
-                            (0, 1),  # Right
-                            (-1, 1),  # Up-Right
-                            (1, 1),  # Down-Right
-                        ]
-                    else:  # Odd rows
-                        directions = [
-                            (-1, 0),  # Up
-                            (1, 0),  # Down
-                            (0, -1),  # Left
-                            (0, 1),  # Right
-                            (-1, -1),  # Up-Left
-                            (1, -1),  # Down-Left
-                        ]
-                    for dr, dc in directions:
-                        nr, nc = row + dr, col + dc
-                        if 0 <= nr < size and 0 <= nc < size:
-                            if board.board[nr][nc] == 0:  # Empty cell
-                                graph[(row, col)][(nr, nc)] = 1
-                            elif board.board[nr][nc] == self.player_id:  # Own cell
-                                graph[(row, col)][(nr, nc)] = 0
-                            # Opponent's cell is ignored
-
-        return graph
-
-    def _ucs_path_cost(self, board) -> int:
-        size = board.size
-
-        graph = self.inicialize_graph(board)
-
-        # Priority queue for UCS
-        frontier = [(0, "start")]  # (cost, node)
-        heapq.heapify(frontier)
-
-        # Keep track of visited nodes and costs
-        visited = set()
-        cost_so_far = {"start": 0}
-
-        while frontier:
-            current_cost, current_node = heapq.heappop(frontier)
-
-            if current_node == "end":
-                return current_cost
-
-            if current_node in visited:
-                continue
-
-            visited.add(current_node)
-
-            # Explore neighbors
-            for next_node, step_cost in graph[current_node].items():
-                if next_node not in visited:
-                    new_cost = current_cost + step_cost
-                    if (
-                        next_node not in cost_so_far
-                        or new_cost < cost_so_far[next_node]
-                    ):
-                        cost_so_far[next_node] = new_cost
-                        heapq.heappush(frontier, (new_cost, next_node))
-
-        return float("inf")  # No path found
+    def _ucs_path_cost(self, cells, size) -> int:
+        """Cheapest connection between the player's two sides (see _ucs_kernel)"""
+        return _ucs_kernel(cells, size, self.player_id)
 
     #     size = board.size
     #     visited = set()
@@ -373,4 +421,4 @@ class Gplayer(Player):
         super().__init__(player_id)
 
     def play(self, board):
-        pass
+        raise NotImplementedError("Gplayer not yet implemented")